@@ -0,0 +1,19 @@
+# conftest.py
+"""
+Registers the pytest suite's command line options.
+
+Options must be defined in the rootdir conftest: pytest reads it before
+parsing the command line, whereas tests/conftest.py is only loaded once the
+arguments are known, so an option defined there would not be recognized (and
+its value would be taken as a path to collect). The options are used by
+tests/conftest.py.
+"""
+import pytest
+
+def pytest_addoption(parser: pytest.Parser):
+    parser.addoption(
+        "--output-jsonl",
+        default=None,
+        metavar="PATH",
+        help="Append each chatbot evaluation result to this JSON Lines file",
+    )
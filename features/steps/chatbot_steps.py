@@ -2,14 +2,16 @@
 from behave import *
 import os
 import logging
-from dotenv import load_dotenv
+import weakref
 
-# Load environment variables from .env file if it exists
-load_dotenv()
+from chatbot_eval_pkg.config import get_config, load_env_once
+
+# Load environment variables from .env file if it exists (once per process)
+load_env_once()
 
 # Import from the new package structure
 from chatbot_eval_pkg.loader import load_test_case_from_file
-from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient
+from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient, DEFAULT_PAYLOAD_SCHEMA
 from chatbot_eval_pkg.evaluator import evaluate_test_case
 from chatbot_eval_pkg.types import EvaluationResult # Import result type
 
@@ -18,11 +20,12 @@ logger = logging.getLogger(__name__)
 # --- Configuration (Read from Environment) ---
 # It's generally better to handle client setup/teardown and config
 # in environment.py, but we'll read basic config here for simplicity.
-CHATBOT_API_ENDPOINT = os.getenv("CHATBOT_API_ENDPOINT")
-CHATBOT_API_KEY = os.getenv("CHATBOT_API_KEY")
-DEEPEVAL_EVALUATION_MODEL = os.getenv("DEEPEVAL_EVALUATION_MODEL")
-DEEPEVAL_RUN_ASYNC_STR = os.getenv("DEEPEVAL_RUN_ASYNC", "true").lower()
-DEEPEVAL_RUN_ASYNC = DEEPEVAL_RUN_ASYNC_STR in ['true', '1', 't', 'y', 'yes']
+cfg = get_config()
+
+def _cleanup_client(client: BaseChatbotClient):
+    """Closes a client created by the steps. Must not reference the context itself."""
+    logger.info("Behave: Cleaning up ChatbotClient from step context...")
+    client.close_session()
 
 # Use behave's context object to store data between steps
 # and manage resources like the chatbot client.
@@ -53,20 +56,25 @@ def step_impl_perform_evaluation(context):
     # If using environment.py, this block would likely be removed or simplified.
     if not hasattr(context, 'chatbot_client'):
         logger.warning("Behave: ChatbotClient not found in context. Initializing here (consider using environment.py).")
-        if not CHATBOT_API_ENDPOINT:
+        if not cfg.chatbot_api_endpoint:
              raise ValueError("CHATBOT_API_ENDPOINT environment variable not set. Cannot initialize client.")
 
         client_config = {
             "type": "http",
-            "api_endpoint": CHATBOT_API_ENDPOINT,
-            "api_key": CHATBOT_API_KEY
+            "api_endpoint": cfg.chatbot_api_endpoint,
+            "api_key": cfg.chatbot_api_key,
+            "payload_schema": cfg.chatbot_payload_schema or DEFAULT_PAYLOAD_SCHEMA,
+            "model_name": cfg.chatbot_model_name,
+            "cache": cfg.use_cache,
+            "cache_dir": cfg.cache_dir,
+            "semantic_cache": cfg.use_semantic_cache,
+            "semantic_cache_threshold": cfg.semantic_threshold
         }
         context.chatbot_client = get_chatbot_client(client_config)
-        # Add a cleanup function to context if not using environment.py
-        def cleanup_client():
-             if hasattr(context, 'chatbot_client') and context.chatbot_client:
-                 logger.info("Behave: Cleaning up ChatbotClient from step context...")
-                 context.chatbot_client.close_session()
+        # Add a cleanup function to context if not using environment.py.
+        # weakref.finalize runs at most once, so the client is not closed again
+        # if the cleanup fires twice or the context is garbage collected later.
+        cleanup_client = weakref.finalize(context, _cleanup_client, context.chatbot_client)
         context.add_cleanup(cleanup_client)
 
 
@@ -80,8 +88,8 @@ def step_impl_perform_evaluation(context):
     context.evaluation_result = evaluate_test_case(
         test_case_data=context.test_case_data,
         chatbot_client=context.chatbot_client,
-        global_model_config=DEEPEVAL_EVALUATION_MODEL,
-        run_async=DEEPEVAL_RUN_ASYNC
+        global_model_config=cfg.deepeval_evaluation_model,
+        run_async=cfg.run_async
     )
     assert isinstance(context.evaluation_result, EvaluationResult), "Evaluation function did not return an EvaluationResult object."
     logger.info(f"Behave: Evaluation finished for test case ID: {context.test_case_id}")
@@ -122,11 +130,11 @@ def step_impl_check_success(context):
 #
 # import os
 # import logging
-# from dotenv import load_dotenv
 # from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient
+# from chatbot_eval_pkg.config import load_env_once
 #
 # logger = logging.getLogger(__name__)
-# load_dotenv()
+# load_env_once()
 #
 # def before_all(context):
 #     # Runs once before all features
@@ -1,95 +1,205 @@
 # run_eval.py
 import argparse
+import asyncio
+import functools
 import logging
 import time
 import os
 import sys
-from typing import List
-from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+from chatbot_eval_pkg.config import get_config, load_env_once
 
 # Load environment variables from .env file first
-load_dotenv()
+load_env_once()
 
 # Import from the new package structure
-from chatbot_eval_pkg.loader import load_test_cases_from_directory
-from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient
-from chatbot_eval_pkg.evaluator import evaluate_test_case
+from chatbot_eval_pkg.loader import iter_test_cases_from_directory, load_test_cases_from_directory
+from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient, PAYLOAD_BUILDERS, DEFAULT_PAYLOAD_SCHEMA
+from chatbot_eval_pkg.evaluator import aevaluate_test_case, aevaluate_test_cases
+from chatbot_eval_pkg.metrics import MetricsFactory
+from chatbot_eval_pkg.sinks import JSONLSink, ResultSink
 from chatbot_eval_pkg.types import EvaluationResult # Import result type
 
+cfg = get_config() # Read after load_env_once so .env values are picked up
+
 # --- Basic Logging Setup ---
 # Configure logging (can be made more sophisticated)
 logging.basicConfig(
-    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    level=cfg.log_level,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     handlers=[logging.StreamHandler(sys.stdout)] # Log to stdout
 )
 logger = logging.getLogger(__name__) # Get logger for this module
 
-# --- Configuration from Environment ---
-TEST_DATA_DIR_DEFAULT = "test_data"
-CHATBOT_API_ENDPOINT = os.getenv("CHATBOT_API_ENDPOINT")
-CHATBOT_API_KEY = os.getenv("CHATBOT_API_KEY")
-DEEPEVAL_EVALUATION_MODEL = os.getenv("DEEPEVAL_EVALUATION_MODEL")
-DEEPEVAL_RUN_ASYNC_STR = os.getenv("DEEPEVAL_RUN_ASYNC", "true").lower()
-DEEPEVAL_RUN_ASYNC = DEEPEVAL_RUN_ASYNC_STR in ['true', '1', 't', 'y', 'yes']
+DEFAULT_MAX_CONCURRENT = 4
 
-def run_all_evaluations(
+async def _evaluate_one(
+    index: int,
+    test_case: Dict[str, Any],
+    client: BaseChatbotClient,
+    global_model_config: Optional[str],
+    run_async: bool,
+    metrics_factory: Optional[MetricsFactory] = None,
+    sink: Optional[ResultSink] = None
+) -> EvaluationResult:
+    """Evaluates one test case, folding unexpected exceptions into an error result."""
+    test_id = test_case.get("id", f"unknown_{index+1}")
+    file_path = test_case.get("_file_path", "N/A")
+    file_name = test_case.get("_file_basename") or os.path.basename(file_path)
+    logger.info(f"--- Running test {index+1}: ID = {test_id} ({file_name}) ---")
+    try:
+        result = await aevaluate_test_case(
+            test_case_data=test_case,
+            chatbot_client=client,
+            global_model_config=global_model_config,
+            run_async=run_async,
+            metrics_factory=metrics_factory,
+            sink=sink
+        )
+        logger.info(f"--- Finished test {index+1}: ID = {test_id}, Success = {result.success} ---")
+        return result
+    except Exception as e:
+         logger.error(f"--- CRITICAL ERROR during evaluation for test {index+1} (ID: {test_id}) ---")
+         logger.exception(e)
+         # Create a minimal error result object
+         result = EvaluationResult(
+             id=test_id,
+             success=False,
+             duration=0.0, # Duration might be inaccurate here
+             file_path=file_path,
+             error=f"Critical evaluation error: {e}",
+             test_case_details=test_case if cfg.include_test_case_details else None
+         )
+         if sink is not None:
+             sink(result)
+         return result
+
+async def run_all_evaluations_async(
     test_dir: str,
     client: BaseChatbotClient,
     global_model_config: Optional[str] = None,
-    run_async: bool = True
+    run_async: bool = True,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    parallel_load: bool = True,
+    batch: bool = False,
+    sink: Optional[ResultSink] = None
 ) -> List[EvaluationResult]:
     """
-    Loads test cases from a directory and runs evaluations using the provided client.
+    Streams test cases from a directory into a pool of concurrent evaluators.
+
+    A producer reads test case files one at a time (off the event loop) and puts
+    them on a bounded queue; `max_concurrent` workers take them off the queue and
+    run aevaluate_test_case. Disk I/O therefore overlaps with evaluation instead
+    of all files being parsed up front. Chatbot calls of different workers
+    overlap; their deepeval.evaluate() calls run one at a time, as DeepEval
+    keeps a process-wide test run. Results are returned in load order.
+
+    With `batch`, all test cases are loaded first and evaluated by
+    aevaluate_test_cases, which submits them to DeepEval in batches.
 
     Args:
         test_dir: The directory containing JSON test case files.
         client: An initialized chatbot client instance.
         global_model_config: Optional configuration for the default evaluation model.
         run_async: Whether to run DeepEval asynchronously.
+        max_concurrent: Maximum number of test cases evaluated at the same time.
+        parallel_load: Read test case files ahead on a thread pool.
+        batch: Submit test cases to DeepEval in batches instead of one at a time.
+        sink: Optional callable receiving each result as it finishes (e.g. a JSONLSink).
 
     Returns:
         A list of EvaluationResult objects.
     """
-    all_results: List[EvaluationResult] = []
+    loop = asyncio.get_running_loop()
+    if batch:
+        test_cases = await loop.run_in_executor(None, functools.partial(load_test_cases_from_directory, test_dir, parallel=parallel_load))
+        if not test_cases:
+            logger.warning(f"No test cases found or loaded from directory: {test_dir}")
+            return []
+        logger.info(f"Starting batched evaluation of {len(test_cases)} test cases (max concurrency: {max_concurrent})...")
+        return await aevaluate_test_cases(
+            test_cases_data=test_cases,
+            chatbot_client=client,
+            global_model_config=global_model_config,
+            run_async=run_async,
+            max_concurrent=max_concurrent,
+            sink=sink
+        )
+
+    metrics_factory = MetricsFactory(global_model_config, run_async) # Shared by all workers
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2 * max_concurrent)
+    results: Dict[int, EvaluationResult] = {}
+
+    async def producer():
+        test_cases = iter_test_cases_from_directory(test_dir, parallel=parallel_load)
+        index = 0
+        try:
+            while True:
+                test_case = await loop.run_in_executor(None, next, test_cases, None)
+                if test_case is None:
+                    break
+                await queue.put((index, test_case))
+                index += 1
+        finally:
+            for _ in range(max_concurrent):
+                await queue.put(None) # One sentinel per worker
 
-    # 1. Load Test Cases
-    test_cases = load_test_cases_from_directory(test_dir)
-    if not test_cases:
+    async def worker():
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            index, test_case = item
+            results[index] = await _evaluate_one(index, test_case, client, global_model_config, run_async, metrics_factory, sink)
+
+    logger.info(f"Starting evaluation run (max concurrency: {max_concurrent})...")
+    await asyncio.gather(producer(), *(worker() for _ in range(max_concurrent)))
+
+    if not results:
         logger.warning(f"No test cases found or loaded from directory: {test_dir}")
         return []
+    return [results[index] for index in sorted(results)]
 
-    # 2. Run Evaluation for Each Test Case
-    total_tests = len(test_cases)
-    logger.info(f"Starting evaluation run for {total_tests} test cases...")
-    for i, test_case in enumerate(test_cases):
-        test_id = test_case.get("id", f"unknown_{i+1}")
-        file_path = test_case.get("_file_path", "N/A")
-        logger.info(f"--- Running test {i+1}/{total_tests}: ID = {test_id} ({os.path.basename(file_path)}) ---")
-        try:
-            result = evaluate_test_case(
-                test_case_data=test_case,
-                chatbot_client=client,
-                global_model_config=global_model_config,
-                run_async=run_async
-            )
-            all_results.append(result)
-            logger.info(f"--- Finished test {i+1}/{total_tests}: ID = {test_id}, Success = {result.success} ---")
-        except Exception as e:
-             logger.error(f"--- CRITICAL ERROR during evaluation for test {i+1}/{total_tests} (ID: {test_id}) ---")
-             logger.exception(e)
-             # Create a minimal error result object
-             error_result = EvaluationResult(
-                 id=test_id,
-                 success=False,
-                 duration=0.0, # Duration might be inaccurate here
-                 file_path=file_path,
-                 error=f"Critical evaluation error: {e}",
-                 test_case_details=test_case
-             )
-             all_results.append(error_result)
-
-    return all_results
+async def _run_on_own_loop(client: BaseChatbotClient, max_concurrent: int, **kwargs) -> List[EvaluationResult]:
+    """
+    Runs run_all_evaluations_async on a loop owned by this script.
+
+    Sizes the default executor (used for blocking client calls and DeepEval) to
+    the concurrency limit and releases loop-bound client resources afterwards.
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=max_concurrent))
+    try:
+        return await run_all_evaluations_async(client=client, max_concurrent=max_concurrent, **kwargs)
+    finally:
+        await client.aclose_session()
+
+def run_all_evaluations(
+    test_dir: str,
+    client: BaseChatbotClient,
+    global_model_config: Optional[str] = None,
+    run_async: bool = True,
+    max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+    parallel_load: bool = True,
+    batch: bool = False,
+    sink: Optional[ResultSink] = None
+) -> List[EvaluationResult]:
+    """
+    Synchronous wrapper around `run_all_evaluations_async`.
+
+    Must not be called from a running event loop.
+    """
+    return asyncio.run(_run_on_own_loop(
+        client=client,
+        max_concurrent=max_concurrent,
+        test_dir=test_dir,
+        global_model_config=global_model_config,
+        run_async=run_async,
+        parallel_load=parallel_load,
+        batch=batch,
+        sink=sink
+    ))
 
 def print_summary_report(results: List[EvaluationResult], total_duration: float):
     """
@@ -100,8 +210,12 @@ def print_summary_report(results: List[EvaluationResult], total_duration: float)
         total_duration: The total time taken for the run.
     """
     total_tests = len(results)
-    passed_tests = sum(1 for r in results if r.success)
-    failed_tests = total_tests - passed_tests
+    failed_results: List[EvaluationResult] = []
+    for result in results:
+        if not result.success:
+            failed_results.append(result)
+    failed_tests = len(failed_results)
+    passed_tests = total_tests - failed_tests
 
     print("\n" + "="*60)
     print("Evaluation Summary Report")
@@ -115,23 +229,26 @@ def print_summary_report(results: List[EvaluationResult], total_duration: float)
     if failed_tests > 0:
         print("\nFailed Test Details:")
         print("-"*60)
-        for result in results:
-            if not result.success:
-                print(f"\nTest ID: {result.id}")
-                print(f"  File: {os.path.basename(result.file_path or 'N/A')}")
-                print(f"  Status: FAILED")
-                print(f"  Reason: {result.error or 'No specific error message.'}")
-                # Print metric-specific failures
-                if result.metrics_results:
-                    failed_metrics_details = [
-                        f"{m.metric} (Score: {m.score:.3f if m.score is not None else 'N/A'}, Threshold: {m.threshold}, Reason: {m.reason or 'N/A'})"
-                        for m in result.metrics_results if not m.success
-                    ]
-                    if failed_metrics_details:
-                        print("  Failed Metrics:")
-                        for detail in failed_metrics_details:
-                            print(f"    - {detail}")
-                print("-"*20)
+        for result in failed_results:
+            print(f"\nTest ID: {result.id}")
+            print(f"  File: {os.path.basename(result.file_path or 'N/A')}")
+            print(f"  Status: FAILED")
+            print(f"  Reason: {result.error or 'No specific error message.'}")
+            # Print metric-specific failures
+            if result.metrics_results:
+                failed_metrics_details = []
+                for m in result.metrics_results:
+                    if m.success:
+                        continue
+                    score_str = f"{m.score:.3f}" if m.score is not None else "N/A"
+                    failed_metrics_details.append(
+                        f"{m.metric} (Score: {score_str}, Threshold: {m.threshold}, Reason: {m.reason or 'N/A'})"
+                    )
+                if failed_metrics_details:
+                    print("  Failed Metrics:")
+                    for detail in failed_metrics_details:
+                        print(f"    - {detail}")
+            print("-"*20)
     print("="*60)
 
 
@@ -140,25 +257,32 @@ if __name__ == "__main__":
     parser.add_argument(
         "--test-dir",
         type=str,
-        default=os.getenv("TEST_DATA_DIR", TEST_DATA_DIR_DEFAULT),
-        help=f"Directory containing JSON test case files (default: reads from TEST_DATA_DIR env var or '{TEST_DATA_DIR_DEFAULT}')",
+        default=cfg.test_data_dir,
+        help="Directory containing JSON test case files (default: reads from TEST_DATA_DIR env var or 'test_data')",
     )
     parser.add_argument(
         "--endpoint",
         type=str,
-        default=CHATBOT_API_ENDPOINT,
+        default=cfg.chatbot_api_endpoint,
         help="Chatbot API endpoint URL (overrides CHATBOT_API_ENDPOINT env var)",
     )
     parser.add_argument(
         "--api-key",
         type=str,
-        default=CHATBOT_API_KEY,
+        default=cfg.chatbot_api_key,
         help="Chatbot API key (overrides CHATBOT_API_KEY env var)",
     )
+    parser.add_argument(
+        "--payload-schema",
+        type=str,
+        choices=sorted(PAYLOAD_BUILDERS),
+        default=cfg.chatbot_payload_schema or DEFAULT_PAYLOAD_SCHEMA,
+        help=f"Request body shape expected by the chatbot API (overrides CHATBOT_PAYLOAD_SCHEMA env var, default: '{DEFAULT_PAYLOAD_SCHEMA}')",
+    )
     parser.add_argument(
         "--eval-model",
         type=str,
-        default=DEEPEVAL_EVALUATION_MODEL,
+        default=cfg.deepeval_evaluation_model,
         help="Evaluation model name (e.g., 'gpt-4', overrides DEEPEVAL_EVALUATION_MODEL env var)",
     )
     parser.add_argument(
@@ -166,14 +290,54 @@ if __name__ == "__main__":
         action="store_true",
         help="Run DeepEval evaluations synchronously (overrides DEEPEVAL_RUN_ASYNC env var)",
     )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=DEFAULT_MAX_CONCURRENT,
+        help=f"Maximum number of test cases evaluated concurrently (default: {DEFAULT_MAX_CONCURRENT})",
+    )
+    parser.add_argument(
+        "--async-client",
+        action="store_true",
+        help="Query the chatbot with the httpx-based AsyncHttpClient (HTTP/2, requires the 'async' extra)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not use the on-disk chatbot response cache (overrides CHATBOT_EVAL_CACHE env var)",
+    )
+    parser.add_argument(
+        "--semantic-cache",
+        action="store_true",
+        help="Reuse cached responses for semantically similar inputs (requires the 'semantic' extra, enables CHATBOT_EVAL_SEMCACHE)",
+    )
+    parser.add_argument(
+        "--no-parallel-load",
+        dest="parallel_load",
+        action="store_false",
+        help="Read test case files one at a time instead of on a thread pool",
+    )
+    parser.add_argument(
+        "--batch",
+        action="store_true",
+        help="Fetch all chatbot responses first, then evaluate test cases with shared metrics in one DeepEval call",
+    )
+    parser.add_argument(
+        "--output-jsonl",
+        type=str,
+        default=None,
+        help="Append each result to this JSON Lines file as soon as it finishes",
+    )
 
     args = parser.parse_args()
+    if args.max_concurrent < 1:
+        parser.error("--max-concurrent must be at least 1")
 
     # Determine final config, prioritizing CLI args over environment variables
     final_endpoint = args.endpoint
     final_api_key = args.api_key
     final_eval_model = args.eval_model
-    final_run_async = not args.sync if args.sync else DEEPEVAL_RUN_ASYNC # CLI --sync overrides env var
+    final_run_async = False if args.sync else cfg.run_async # CLI --sync overrides env var
 
     if not final_endpoint:
         logger.critical("Chatbot API endpoint is required. Set CHATBOT_API_ENDPOINT environment variable or use --endpoint argument.")
@@ -183,24 +347,45 @@ if __name__ == "__main__":
     logger.info(f"Using API Endpoint: {final_endpoint}")
     logger.info(f"Using Evaluation Model: {final_eval_model or 'DeepEval Default'}")
     logger.info(f"DeepEval Async Mode: {final_run_async}")
+    logger.info(f"Max Concurrent Test Cases: {args.max_concurrent}")
 
     chatbot_client = None
+    result_sink = None
     try:
         # Initialize Chatbot Client using the factory
         client_config = {
-            "type": "http", # Assuming HTTP client
+            "type": "http_async" if args.async_client else "http", # Assuming HTTP client
             "api_endpoint": final_endpoint,
-            "api_key": final_api_key
+            "api_key": final_api_key,
+            "payload_schema": args.payload_schema,
+            "model_name": cfg.chatbot_model_name,
+            "pool_maxsize": args.max_concurrent, # One pooled connection per in-flight test case
+            "cache": cfg.use_cache,
+            "cache_dir": cfg.cache_dir,
+            "semantic_cache": cfg.use_semantic_cache,
+            "semantic_cache_threshold": cfg.semantic_threshold
         }
+        if args.no_cache:
+            client_config["cache"] = False
+            client_config["semantic_cache"] = False
+        elif args.semantic_cache:
+            client_config["semantic_cache"] = True
         chatbot_client = get_chatbot_client(client_config)
 
+        if args.output_jsonl:
+            result_sink = JSONLSink(args.output_jsonl)
+
         # Run evaluations
         start_time = time.time()
         evaluation_results = run_all_evaluations(
             test_dir=args.test_dir,
             client=chatbot_client,
             global_model_config=final_eval_model,
-            run_async=final_run_async
+            run_async=final_run_async,
+            max_concurrent=args.max_concurrent,
+            parallel_load=args.parallel_load,
+            batch=args.batch,
+            sink=result_sink
         )
         end_time = time.time()
 
@@ -222,3 +407,5 @@ if __name__ == "__main__":
         # Ensure client session is closed if it was initialized
         if chatbot_client:
             chatbot_client.close_session()
+        if result_sink:
+            result_sink.close()
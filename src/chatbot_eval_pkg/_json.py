@@ -0,0 +1,24 @@
+# src/chatbot_eval_pkg/_json.py
+"""JSON helpers that use orjson when it is installed and the stdlib json module otherwise."""
+import json
+from typing import Any, Union
+
+try:
+    import orjson # Optional: faster encoding/decoding, see the 'fast' extra
+except ImportError:
+    orjson = None
+
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers only need to catch this
+JSONDecodeError = json.JSONDecodeError
+
+def dumps(obj: Any) -> bytes:
+    """Serializes obj to compact UTF-8 encoded JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def loads(data: Union[bytes, bytearray, str]) -> Any:
+    """Deserializes JSON from bytes or str. Raises JSONDecodeError on invalid input."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
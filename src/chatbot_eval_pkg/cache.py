@@ -0,0 +1,199 @@
+# src/chatbot_eval_pkg/cache.py
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import numpy as np # Optional: see the 'semantic' extra
+except ImportError:
+    np = None
+
+try:
+    import numba # Optional: JIT-compiled similarity search
+except ImportError:
+    numba = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+_NO_MATCH = -2.0 # Below any cosine similarity; avoids infinities under fastmath
+
+# Embeddings are stored as int8: unit vectors scaled by _Q8_SCALE and rounded.
+# A dot product of two quantized vectors times _Q8_INV_SQ approximates their
+# cosine similarity (typically within 0.01), at a quarter of the memory.
+_Q8_SCALE = 127.0
+_Q8_INV_SQ = 1.0 / (_Q8_SCALE * _Q8_SCALE)
+
+def _quantize(embedding: Any) -> Any:
+    """Returns the contiguous int8 form of an L2-normalized embedding."""
+    return np.ascontiguousarray(np.clip(np.rint(np.asarray(embedding, dtype=np.float32) * _Q8_SCALE), -127, 127), dtype=np.int8)
+
+if numba is not None and np is not None:
+    @numba.njit(cache=True, parallel=True, fastmath=True)
+    def _best_match(matrix, history_codes, size, query, history_code):
+        """Returns (row, similarity) of the best row among the first size rows with history_code."""
+        sims = np.empty(size, dtype=np.float32)
+        for i in numba.prange(size):
+            if history_codes[i] != history_code:
+                sims[i] = _NO_MATCH
+            else:
+                s = np.int32(0) # int8 products summed in int32 cannot overflow for any sane dimension
+                for j in range(matrix.shape[1]):
+                    s += np.int32(matrix[i, j]) * np.int32(query[j])
+                sims[i] = s * _Q8_INV_SQ
+        best = 0
+        for i in range(1, size): # Serial argmax: a max/argmax pair updated in prange would race
+            if sims[i] > sims[best]:
+                best = i
+        return best, sims[best]
+else:
+    _best_match = None
+
+def _numpy_best_match(matrix, history_codes, size, query, history_code):
+    """NumPy equivalent of the numba _best_match kernel."""
+    # matmul would accumulate in int8 and overflow; einsum accumulates in int32 without copying the matrix
+    sims = np.einsum("ij,j->i", matrix[:size], query, dtype=np.int32) * np.float32(_Q8_INV_SQ)
+    sims[history_codes[:size] != history_code] = _NO_MATCH
+    best = int(np.argmax(sims))
+    return best, sims[best]
+
+def history_key(conversation_history: Optional[List[Dict[str, str]]]) -> str:
+    """Returns the SHA-256 of the canonical JSON of a conversation history."""
+    return hashlib.sha256(json.dumps(conversation_history, sort_keys=True).encode("utf-8")).hexdigest()
+
+class SemanticResponseCache:
+    """
+    In-memory cache of chatbot responses looked up by semantic similarity.
+
+    User inputs are embedded with a sentence-transformers model (L2-normalized),
+    quantized to int8 and stored as rows of a preallocated matrix, so a lookup is
+    a single matrix-vector product (a parallel JIT kernel when numba is
+    installed). An entry is a hit when its conversation history is identical and
+    its approximate cosine similarity is at least `threshold`. When full, the
+    least recently used entry is overwritten.
+
+    Pass an instance as `cache=` to the evaluator functions to skip chatbot calls
+    for repeated or paraphrased inputs within a run. For a cache that persists
+    across runs, see SemanticCachingClient. Requires the optional 'semantic'
+    extra (numpy, sentence-transformers).
+    """
+    def __init__(
+        self,
+        threshold: float = 0.9,
+        max_entries: int = 10_000,
+        embedding_model: str = DEFAULT_EMBEDDING_MODEL,
+        encoder: Optional[Any] = None
+    ):
+        """
+        Initializes the SemanticResponseCache.
+
+        Args:
+            threshold (float): Minimum cosine similarity for a hit.
+            max_entries (int): Maximum number of cached responses.
+            embedding_model (str): sentence-transformers model used to embed inputs.
+            encoder (Optional[Any]): Pre-loaded model with the SentenceTransformer
+                                     encode()/get_sentence_embedding_dimension() API.
+                                     Loaded from embedding_model if omitted.
+        """
+        if np is None:
+            raise ImportError("SemanticResponseCache requires numpy. Install it with: pip install \"chatbot-eval-pkg[semantic]\"")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        if encoder is None:
+            # Imported lazily: sentence-transformers pulls in torch, which is slow to import
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as e:
+                raise ImportError("SemanticResponseCache requires sentence-transformers. Install it with: pip install \"chatbot-eval-pkg[semantic]\"") from e
+            encoder = SentenceTransformer(embedding_model)
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._encoder = encoder
+        dim = encoder.get_sentence_embedding_dimension()
+        self._matrix = np.zeros((max_entries, dim), dtype=np.int8)
+        # Histories are compared as small integer codes instead of hash strings
+        self._history_codes = np.full(max_entries, -1, dtype=np.int64)
+        self._codes_by_history_key: Dict[str, int] = {}
+        self._best_match = _best_match if _best_match is not None else _numpy_best_match
+        self._values: List[Optional[Tuple[str, Optional[List[str]]]]] = [None] * max_entries
+        self._last_used = np.zeros(max_entries, dtype=np.int64)
+        self._tick = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        if _best_match is not None:
+            # Compile (or load the cached compilation) now rather than on the first lookup
+            self._best_match(self._matrix[:1], self._history_codes[:1], 1, self._matrix[0], -1)
+        logger.info(f"SemanticResponseCache initialized (threshold {threshold}, max {max_entries} entries)")
+
+    def __len__(self) -> int:
+        return self._size
+
+    def embed(self, user_input: str) -> Any:
+        """Returns the L2-normalized float32 embedding of user_input."""
+        return np.ascontiguousarray(self._encoder.encode([user_input], normalize_embeddings=True, convert_to_numpy=True)[0], dtype=np.float32)
+
+    def get(
+        self,
+        user_input: str,
+        conversation_history: Optional[List[Dict[str, str]]] = None,
+        embedding: Optional[Any] = None
+    ) -> Optional[Tuple[str, Optional[List[str]]]]:
+        """
+        Looks up a response for a similar input with the same conversation history.
+
+        Args:
+            user_input (str): The latest user input.
+            conversation_history (Optional[List[Dict[str, str]]]): Conversation history.
+            embedding (Optional[Any]): Precomputed embed(user_input), if available.
+
+        Returns:
+            The cached (response, retrieval_context), or None on a miss.
+        """
+        code = self._codes_by_history_key.get(history_key(conversation_history))
+        if code is None:
+            return None # Nothing was stored for this history, so skip embedding the input
+        if embedding is None:
+            embedding = self.embed(user_input)
+        query = _quantize(embedding)
+        with self._lock:
+            if self._size == 0:
+                return None
+            # Only entries with an identical history may match
+            best, similarity = self._best_match(self._matrix, self._history_codes, self._size, query, code)
+            best = int(best)
+            if similarity < self.threshold:
+                return None
+            self._tick += 1
+            self._last_used[best] = self._tick
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Semantic response cache hit (similarity %.3f) for input: %s", similarity, user_input)
+            return self._values[best]
+
+    def put(
+        self,
+        user_input: str,
+        conversation_history: Optional[List[Dict[str, str]]],
+        response: str,
+        retrieval_context: Optional[List[str]] = None,
+        embedding: Optional[Any] = None
+    ) -> None:
+        """Stores a response, evicting the least recently used entry when full."""
+        if embedding is None:
+            embedding = self.embed(user_input)
+        key = history_key(conversation_history)
+        with self._lock:
+            code = self._codes_by_history_key.setdefault(key, len(self._codes_by_history_key))
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                slot = int(np.argmin(self._last_used))
+            self._matrix[slot] = _quantize(embedding)
+            self._history_codes[slot] = code
+            self._values[slot] = (response, retrieval_context)
+            self._tick += 1
+            self._last_used[slot] = self._tick
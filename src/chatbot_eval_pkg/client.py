@@ -1,15 +1,123 @@
 # src/chatbot_eval_pkg/client.py
 import requests
+import asyncio
+import functools
+import hashlib
 import json
 import logging
+import os
+import tempfile
+import threading
 from typing import List, Dict, Optional, Tuple, Any, Union
 from abc import ABC, abstractmethod
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import _json
+from .cache import DEFAULT_EMBEDDING_MODEL, history_key
+from .config import get_config
+
+try:
+    import httpx # Optional: only required by AsyncHttpClient
+except ImportError:
+    httpx = None
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "chatbot_eval")
+DEFAULT_POOL_MAXSIZE = 64 # Connections kept per host by HttpClient's session
+
+# Keys probed (in order) for the chatbot response text and the retrieval context
+_RESPONSE_KEYS = ('response', 'answer', 'text', 'output', 'completion', 'content')
+_CONTEXT_KEYS = ('retrieved_context', 'context', 'sources', 'documents')
+
+def _extract_response(response_data: Any) -> Optional[Any]:
+    """Returns the chatbot response from decoded JSON, or None if it cannot be found."""
+    if isinstance(response_data, str): # Handle plain text response
+        return response_data
+    if not isinstance(response_data, dict):
+        return None
+
+    chatbot_response = next((response_data[k] for k in _RESPONSE_KEYS if k in response_data), None)
+    # Handle nested structures like OpenAI's format
+    if not chatbot_response:
+        choices = response_data.get('choices')
+        if isinstance(choices, list) and choices and isinstance(choices[0], dict):
+            choice = choices[0]
+            message = choice.get('message')
+            if isinstance(message, dict) and 'content' in message:
+                return message['content']
+            if 'text' in choice:
+                return choice['text']
+    return chatbot_response
+
+def _key_extractor(response_key: str):
+    """Returns an extractor that reads the response from a single, known key."""
+    def extract(response_data: Any) -> Optional[Any]:
+        return response_data.get(response_key) if isinstance(response_data, dict) else None
+    return extract
+
+def _extract_context(response_data: Any) -> Optional[List[str]]:
+    """Returns the retrieval context list from decoded JSON, if the API provided one."""
+    if not isinstance(response_data, dict):
+        return None
+    key = next((k for k in _CONTEXT_KEYS if isinstance(response_data.get(k), list)), None)
+    if key is None:
+        return None
+    retrieval_context = response_data[key]
+    logger.info(f"Extracted retrieval context from key '{key}': {len(retrieval_context)} items.")
+    return retrieval_context
+
+# --- Request Payload Builders ---
+# A real API usually expects exactly one of these shapes; HttpClient picks one at
+# init time via `payload_schema`. 'union' sends all common variations at once.
+def _with_user_turn(user_input: str, conversation_history: Optional[List[Dict[str, str]]]) -> List[Dict[str, str]]:
+    """Returns conversation_history followed by the new user message, without mutating the history."""
+    user_message = {"role": "user", "content": user_input}
+    if not conversation_history:
+        return [user_message]
+    messages = list(conversation_history) # One shallow copy instead of history + [message]
+    messages.append(user_message)
+    return messages
+
+def _build_union_payload(user_input: str, conversation_history: Optional[List[Dict[str, str]]]) -> Dict[str, Any]:
+    return {
+        "input": user_input, # Common key
+        "query": user_input, # Another common key
+        "prompt": user_input, # Yet another
+        "messages": _with_user_turn(user_input, conversation_history),
+        "history": conversation_history,
+    }
+
+def _build_messages_payload(user_input: str, conversation_history: Optional[List[Dict[str, str]]]) -> Dict[str, Any]:
+    return {"messages": _with_user_turn(user_input, conversation_history)}
+
+def _build_openai_payload(user_input: str, conversation_history: Optional[List[Dict[str, str]]], model: Optional[str] = None) -> Dict[str, Any]:
+    payload = _build_messages_payload(user_input, conversation_history)
+    if model:
+        payload["model"] = model # Required by OpenAI-compatible chat completion APIs
+    return payload
+
+def _build_simple_input_payload(user_input: str, conversation_history: Optional[List[Dict[str, str]]]) -> Dict[str, Any]:
+    return {"input": user_input, "history": conversation_history}
+
+def _build_query_payload(user_input: str, conversation_history: Optional[List[Dict[str, str]]]) -> Dict[str, Any]:
+    return {"query": user_input}
+
+PAYLOAD_BUILDERS = {
+    "union": _build_union_payload,
+    "openai": _build_openai_payload, # OpenAI-style chat completion messages
+    "messages": _build_messages_payload,
+    "simple_input": _build_simple_input_payload,
+    "query": _build_query_payload,
+}
+DEFAULT_PAYLOAD_SCHEMA = "union"
+
 # Define an interface for different client types (HTTP, TestClient, etc.)
 class BaseChatbotClient(ABC):
     """Abstract base class for chatbot clients."""
+    model_name: Optional[str] = None # Model served by the chatbot, if known
+
     @abstractmethod
     def get_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
         """Sends input and retrieves response and context."""
@@ -20,12 +128,39 @@ class BaseChatbotClient(ABC):
         """Closes any underlying connections or sessions."""
         pass
 
+    async def aget_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """
+        Async variant of get_response.
+
+        The default implementation runs get_response in the event loop's default
+        executor. Clients with a native async transport should override it.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.get_response, user_input, conversation_history))
+
+    async def aclose_session(self):
+        """
+        Releases resources bound to the running event loop (no-op by default).
+        close_session() must still be called to release everything else.
+        """
+        pass
+
 # Implementation for standard HTTP/HTTPS endpoints
 class HttpClient(BaseChatbotClient):
     """
     Handles communication with a target chatbot API via HTTP/HTTPS.
     """
-    def __init__(self, api_endpoint: str, api_key: Optional[str] = None, timeout: int = 30):
+    def __init__(
+        self,
+        api_endpoint: str,
+        api_key: Optional[str] = None,
+        timeout: int = 30,
+        payload_schema: str = DEFAULT_PAYLOAD_SCHEMA,
+        response_key: Optional[str] = None,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_retries: int = 3,
+        model_name: Optional[str] = None
+    ):
         """
         Initializes the HttpClient.
 
@@ -33,18 +168,62 @@ class HttpClient(BaseChatbotClient):
             api_endpoint (str): The URL of the chatbot API endpoint.
             api_key (Optional[str]): Optional API key for authentication.
             timeout (int): Request timeout in seconds.
+            payload_schema (str): Request body shape, one of PAYLOAD_BUILDERS
+                                  ('union' sends all common variations).
+            response_key (Optional[str]): Key holding the response text, if known.
+                                          Skips probing the common keys.
+            pool_maxsize (int): Connections kept alive per host. Size this to the
+                                number of concurrent requests.
+            max_retries (int): Retries on connection errors and 502/503/504 responses.
+            model_name (Optional[str]): Model served by the chatbot. Sent as 'model'
+                                        with the 'openai' payload schema.
         """
         if not api_endpoint:
             raise ValueError("Chatbot API endpoint must be provided.")
+        if payload_schema not in PAYLOAD_BUILDERS:
+            raise ValueError(f"Unsupported payload_schema '{payload_schema}'. Expected one of: {', '.join(PAYLOAD_BUILDERS)}")
         self.api_endpoint = api_endpoint
         self.api_key = api_key
         self.timeout = timeout
-        self.session = requests.Session() # Use a session for potential connection pooling
-        self.session.headers.update({"Content-Type": "application/json", "Accept": "application/json"})
+        self.model_name = model_name
+        self.headers = {"Content-Type": "application/json", "Accept": "application/json"}
         if self.api_key:
             # Defaulting to Bearer token, users might need to customize headers
-            self.session.headers.update({"Authorization": f"Bearer {self.api_key}"})
-        logger.info(f"HttpClient initialized for endpoint: {self.api_endpoint}")
+            self.headers["Authorization"] = f"Bearer {self.api_key}"
+        self.session = requests.Session() # Use a session for connection pooling
+        self.session.headers.update(self.headers)
+        self._closed = False
+        # Pool enough connections for concurrent callers and retry transient
+        # gateway errors instead of failing the test case
+        adapter = HTTPAdapter(
+            pool_connections=DEFAULT_POOL_MAXSIZE,
+            pool_maxsize=pool_maxsize,
+            max_retries=Retry(
+                total=max_retries,
+                backoff_factor=0.2,
+                status_forcelist=(502, 503, 504),
+                allowed_methods=["POST"],
+                raise_on_status=False, # Return the last response so get_response can report its status
+            ),
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Specialize payload building and response extraction once for this API
+        self.payload_schema = payload_schema
+        self._build_payload = PAYLOAD_BUILDERS[payload_schema]
+        if model_name and payload_schema == "openai":
+            self._build_payload = functools.partial(_build_openai_payload, model=model_name)
+        self._extract = _key_extractor(response_key) if response_key else _extract_response
+        logger.info(f"{type(self).__name__} initialized for endpoint: {self.api_endpoint} (payload schema: {payload_schema})")
+
+    def _parse_response_data(self, response_data: Any) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Extracts the chatbot response text and optional retrieval context from decoded JSON."""
+        chatbot_response = self._extract(response_data)
+        if chatbot_response is None:
+             logger.error(f"Could not find chatbot response text in API response: {response_data}")
+             return None, None
+
+        return str(chatbot_response), _extract_context(response_data)
 
     def get_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
         """
@@ -57,69 +236,28 @@ class HttpClient(BaseChatbotClient):
         Returns:
             Tuple[Optional[str], Optional[List[str]]]: Chatbot response text and optional retrieval context.
         """
-        # Flexible payload structure - common patterns
-        payload = {
-            "input": user_input, # Common key
-            "query": user_input, # Another common key
-            "prompt": user_input, # Yet another
-            "messages": conversation_history + [{"role": "user", "content": user_input}] if conversation_history else [{"role": "user", "content": user_input}],
-            "history": conversation_history,
-        }
-        # Note: A real API likely only uses one of these patterns.
-        # Users might need to configure which payload structure to use or subclass this client.
-        # For simplicity now, we send common variations. A more robust solution
-        # would involve configuration or specific client implementations per API type.
-
-        logger.debug(f"Sending request to {self.api_endpoint} with payload containing user input: {user_input}")
+        payload = self._build_payload(user_input, conversation_history)
 
-        try:
-            response = self.session.post(self.api_endpoint, json=payload, timeout=self.timeout)
-            response.raise_for_status() # Raise HTTPError for bad responses (4xx or 5xx)
-
-            response_data = response.json()
-            logger.debug(f"Received response: {response_data}")
-
-            # --- Extract Chatbot Response Text ---
-            # Flexible extraction - try common keys
-            possible_keys = ['response', 'answer', 'text', 'output', 'completion', 'content']
-            chatbot_response = None
-            if isinstance(response_data, dict):
-                for key in possible_keys:
-                    if key in response_data:
-                        chatbot_response = response_data[key]
-                        break
-                # Handle nested structures like OpenAI's format
-                if not chatbot_response and 'choices' in response_data and isinstance(response_data['choices'], list) and response_data['choices']:
-                    choice = response_data['choices'][0]
-                    if isinstance(choice, dict) and 'message' in choice and isinstance(choice['message'], dict) and 'content' in choice['message']:
-                         chatbot_response = choice['message']['content']
-                    elif isinstance(choice, dict) and 'text' in choice:
-                         chatbot_response = choice['text']
-
-            elif isinstance(response_data, str): # Handle plain text response
-                chatbot_response = response_data
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending request to %s with payload containing user input: %s", self.api_endpoint, user_input)
 
-            if chatbot_response is None:
-                 logger.error(f"Could not find chatbot response text in API response: {response_data}")
-                 return None, None
+        try:
+            # Content-Type is already set on the session headers
+            response = self.session.post(self.api_endpoint, data=_json.dumps(payload), timeout=self.timeout)
+            if not response.ok: # 4xx/5xx: report without raising and unwinding an HTTPError
+                logger.error(f"Chatbot API at {self.api_endpoint} returned HTTP {response.status_code}: {response.text[:500]}")
+                return None, None
 
-            # --- Extract Retrieval Context (Optional) ---
-            retrieval_context = None
-            if isinstance(response_data, dict):
-                # Try common keys for context
-                context_keys = ['retrieved_context', 'context', 'sources', 'documents']
-                for key in context_keys:
-                    if key in response_data and isinstance(response_data[key], list):
-                        retrieval_context = response_data[key]
-                        logger.info(f"Extracted retrieval context from key '{key}': {len(retrieval_context)} items.")
-                        break
+            response_data = _json.loads(response.content)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received response: %r", response_data)
 
-            return str(chatbot_response), retrieval_context
+            return self._parse_response_data(response_data)
 
         except requests.exceptions.RequestException as e:
             logger.error(f"Error communicating with chatbot API at {self.api_endpoint}: {e}")
             return None, None
-        except json.JSONDecodeError as e:
+        except _json.JSONDecodeError as e:
             logger.error(f"Error decoding JSON response from chatbot API: {e}")
             logger.error(f"Response text: {response.text[:500]}...") # Log snippet
             return None, None
@@ -128,11 +266,173 @@ class HttpClient(BaseChatbotClient):
             return None, None
 
     def close_session(self):
-        """Closes the underlying requests session."""
+        """Closes the underlying requests session. Further calls are no-ops."""
+        if self._closed:
+            return
+        self._closed = True
         self.session.close()
         logger.info("HttpClient session closed.")
 
 
+# Implementation for HTTP/HTTPS endpoints using a native async transport
+class AsyncHttpClient(HttpClient):
+    """
+    HttpClient variant whose aget_response uses httpx.AsyncClient over HTTP/2.
+
+    Concurrent aget_response calls are multiplexed over a shared connection pool
+    instead of each blocking a worker thread. The synchronous get_response
+    inherited from HttpClient remains available as a fallback.
+    Requires the optional 'async' extra (httpx with HTTP/2 support).
+    """
+    def __init__(
+        self,
+        api_endpoint: str,
+        api_key: Optional[str] = None,
+        timeout: int = 30,
+        payload_schema: str = DEFAULT_PAYLOAD_SCHEMA,
+        response_key: Optional[str] = None,
+        max_connections: int = 128,
+        max_keepalive_connections: int = 64,
+        model_name: Optional[str] = None,
+        pool_maxsize: Optional[int] = None,
+        max_retries: int = 3
+    ):
+        """
+        Initializes the AsyncHttpClient.
+
+        Args:
+            api_endpoint (str): The URL of the chatbot API endpoint.
+            api_key (Optional[str]): Optional API key for authentication.
+            timeout (int): Request timeout in seconds.
+            payload_schema (str): Request body shape, one of PAYLOAD_BUILDERS.
+            response_key (Optional[str]): Key holding the response text, if known.
+            max_connections (int): Maximum number of connections in the httpx pool.
+            max_keepalive_connections (int): Maximum number of idle connections kept alive.
+            model_name (Optional[str]): Model served by the chatbot.
+            pool_maxsize (Optional[int]): Connections per pool, as for HttpClient. When
+                                          given, it caps max_connections and
+                                          max_keepalive_connections.
+            max_retries (int): Retries on connection errors, for both transports. (httpx
+                               does not retry 502/503/504 responses like HttpClient does.)
+        """
+        if httpx is None:
+            raise ImportError("AsyncHttpClient requires httpx. Install it with: pip install \"chatbot-eval-pkg[async]\"")
+        super().__init__(
+            api_endpoint=api_endpoint,
+            api_key=api_key,
+            timeout=timeout,
+            payload_schema=payload_schema,
+            response_key=response_key,
+            pool_maxsize=pool_maxsize or DEFAULT_POOL_MAXSIZE,
+            max_retries=max_retries,
+            model_name=model_name
+        )
+        if pool_maxsize:
+            max_connections = min(max_connections, pool_maxsize)
+            max_keepalive_connections = min(max_keepalive_connections, pool_maxsize)
+        self.limits = httpx.Limits(max_keepalive_connections=max_keepalive_connections, max_connections=max_connections)
+        self.max_retries = max_retries
+        # httpx clients are bound to the event loop they are first used on,
+        # so the client is created lazily from within the running loop.
+        self._async_client = None
+        self._async_client_loop = None
+
+    async def _get_async_client(self) -> "httpx.AsyncClient":
+        """
+        Returns the httpx client for the running event loop, creating it if needed.
+
+        A client left over from a previous loop (e.g. an earlier asyncio.run)
+        is closed first so its connections are not leaked.
+        """
+        loop = asyncio.get_running_loop()
+        if self._async_client is not None and self._async_client_loop is not loop:
+            stale = self._async_client
+            # Detach first so concurrent callers on this loop create the new client
+            self._async_client = None
+            self._async_client_loop = None
+            try:
+                await stale.aclose()
+            except Exception as e: # Its loop may already be closed
+                logger.debug(f"Could not close httpx client of a previous event loop cleanly: {e}")
+        if self._async_client is None:
+            # Limits and HTTP/2 are transport settings once a transport is passed
+            transport = httpx.AsyncHTTPTransport(http2=True, limits=self.limits, retries=self.max_retries)
+            self._async_client = httpx.AsyncClient(
+                transport=transport,
+                headers=self.headers,
+                timeout=httpx.Timeout(self.timeout),
+            )
+            self._async_client_loop = loop
+        return self._async_client
+
+    async def aget_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """
+        Sends input to the chatbot API without blocking the event loop.
+
+        Args:
+            user_input (str): The latest user input.
+            conversation_history (Optional[List[Dict[str, str]]]): Conversation history.
+
+        Returns:
+            Tuple[Optional[str], Optional[List[str]]]: Chatbot response text and optional retrieval context.
+        """
+        payload = self._build_payload(user_input, conversation_history)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending async request to %s with payload containing user input: %s", self.api_endpoint, user_input)
+
+        try:
+            # Content-Type is already set on the client headers
+            client = await self._get_async_client()
+            response = await client.post(self.api_endpoint, content=_json.dumps(payload))
+            if response.is_error: # 4xx/5xx: report without raising and unwinding an HTTPStatusError
+                logger.error(f"Chatbot API at {self.api_endpoint} returned HTTP {response.status_code}: {response.text[:500]}")
+                return None, None
+
+            response_data = _json.loads(response.content)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received response: %r", response_data)
+
+            return self._parse_response_data(response_data)
+
+        except httpx.HTTPError as e:
+            logger.error(f"Error communicating with chatbot API at {self.api_endpoint}: {e}")
+            return None, None
+        except _json.JSONDecodeError as e:
+            logger.error(f"Error decoding JSON response from chatbot API: {e}")
+            logger.error(f"Response text: {response.text[:500]}...") # Log snippet
+            return None, None
+        except Exception as e:
+            logger.exception(f"An unexpected error occurred during chatbot interaction: {e}") # Log stack trace
+            return None, None
+
+    async def aclose_session(self):
+        """Closes the httpx client. Must be awaited on the loop that used it."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._async_client_loop = None
+            logger.info("AsyncHttpClient httpx client closed.")
+
+    def close_session(self):
+        """Closes the requests session and, if still open, the httpx client."""
+        super().close_session()
+        if self._async_client is None:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop is running: close the httpx client on a temporary one.
+            try:
+                asyncio.run(self.aclose_session())
+            except Exception as e:
+                logger.debug(f"Could not close httpx client cleanly: {e}")
+                self._async_client = None
+                self._async_client_loop = None
+        else:
+            logger.warning("AsyncHttpClient.close_session() called from a running event loop; await aclose_session() first.")
+
+
 # Implementation for FastAPI TestClient or similar objects
 class TestClientWrapper(BaseChatbotClient):
     """
@@ -159,47 +459,30 @@ class TestClientWrapper(BaseChatbotClient):
         Adapts the payload and response extraction logic similarly to HttpClient.
         """
         # Adapt payload structure based on the expected input of the test application
-        payload = {
-            "input": user_input,
-            "history": conversation_history
-            # Adjust as needed for the specific test application's API
-        }
-        logger.debug(f"Sending request via TestClient to {self.endpoint} with payload containing user input: {user_input}")
+        payload = _build_simple_input_payload(user_input, conversation_history)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Sending request via TestClient to %s with payload containing user input: %s", self.endpoint, user_input)
 
         try:
             # Use the test client's post method
             response = self.test_client.post(self.endpoint, json=payload)
-            response.raise_for_status() # TestClient often raises exceptions directly on failure
-
-            response_data = response.json()
-            logger.debug(f"Received response via TestClient: {response_data}")
-
-            # --- Extract Chatbot Response Text (similar logic to HttpClient) ---
-            possible_keys = ['response', 'answer', 'text', 'output', 'completion', 'content']
-            chatbot_response = None
-            if isinstance(response_data, dict):
-                for key in possible_keys:
-                    if key in response_data:
-                        chatbot_response = response_data[key]
-                        break
-            elif isinstance(response_data, str):
-                 chatbot_response = response_data
-
+            if response.status_code >= 400:
+                logger.error(f"TestClient request to {self.endpoint} returned HTTP {response.status_code}")
+                return None, None
+
+            # Decode the raw body directly when the client exposes it (requests/httpx style)
+            content = getattr(response, "content", None)
+            response_data = _json.loads(content) if isinstance(content, (bytes, str)) else response.json()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Received response via TestClient: %r", response_data)
+
+            # --- Extract Chatbot Response Text (same logic as HttpClient) ---
+            chatbot_response = _extract_response(response_data)
             if chatbot_response is None:
                  logger.error(f"Could not find chatbot response text in TestClient response: {response_data}")
                  return None, None
 
-            # --- Extract Retrieval Context (similar logic to HttpClient) ---
-            retrieval_context = None
-            if isinstance(response_data, dict):
-                context_keys = ['retrieved_context', 'context', 'sources', 'documents']
-                for key in context_keys:
-                    if key in response_data and isinstance(response_data[key], list):
-                        retrieval_context = response_data[key]
-                        logger.info(f"Extracted retrieval context from key '{key}': {len(retrieval_context)} items.")
-                        break
-
-            return str(chatbot_response), retrieval_context
+            return str(chatbot_response), _extract_context(response_data)
 
         except Exception as e:
             # Catch potential exceptions from the test client or response processing
@@ -211,6 +494,271 @@ class TestClientWrapper(BaseChatbotClient):
         logger.debug("TestClientWrapper close_session called (typically no-op).")
         pass
 
+# Wrapper that caches responses of another client on disk
+class CachingClient(BaseChatbotClient):
+    """
+    Wraps another client and caches its responses on disk.
+
+    Entries are content-addressed by the SHA-256 of the endpoint, user input and
+    conversation history, and stored as JSON under cache_dir/<key[:2]>/<key>.json.
+    Only successful responses are cached, so failed calls are retried on the next run.
+    """
+    def __init__(self, inner: BaseChatbotClient, cache_dir: Optional[str] = None):
+        """
+        Initializes the CachingClient.
+
+        Args:
+            inner (BaseChatbotClient): The client used on cache misses.
+            cache_dir (Optional[str]): Cache directory. Defaults to the configured cache_dir
+                                       (CHATBOT_EVAL_CACHE_DIR) or ~/.cache/chatbot_eval.
+        """
+        self.inner = inner
+        self.cache_dir = cache_dir or get_config().cache_dir or DEFAULT_CACHE_DIR
+        # Part of the cache key, so responses from different chatbots never collide
+        self.endpoint = getattr(inner, "api_endpoint", None) or getattr(inner, "endpoint", None) or type(inner).__name__
+        self.model_name = inner.model_name
+        logger.info(f"CachingClient initialized for endpoint: {self.endpoint} (cache dir: {self.cache_dir})")
+
+    def _cache_key(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]]) -> str:
+        key_data = {"endpoint": self.endpoint, "user_input": user_input, "history": conversation_history}
+        if self.model_name:
+            key_data["model"] = self.model_name
+        raw = json.dumps(key_data, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Tuple[Optional[str], Optional[List[str]]]]:
+        """Returns the cached (response, retrieval_context) for key, or None on a miss."""
+        try:
+            with open(self._cache_path(key), 'rb') as f:
+                entry = _json.loads(f.read())
+            return entry["response"], entry.get("retrieval_context")
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+    def _write(self, key: str, response: str, retrieval_context: Optional[List[str]]):
+        """Stores a response atomically (write to a temp file, then os.replace)."""
+        path = self._cache_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(_json.dumps({"response": response, "retrieval_context": retrieval_context}))
+                os.replace(tmp_path, path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key}: {e}")
+
+    def get_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Returns the cached response if present, otherwise queries the inner client."""
+        key = self._cache_key(user_input, conversation_history)
+        cached = self._read(key)
+        if cached is not None:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Cache hit for user input: %s", user_input)
+            return cached
+
+        response, retrieval_context = self.inner.get_response(user_input, conversation_history)
+        if response is not None:
+            self._write(key, response, retrieval_context)
+        return response, retrieval_context
+
+    async def aget_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Async variant of get_response, delegating misses to the inner client's aget_response."""
+        key = self._cache_key(user_input, conversation_history)
+        cached = self._read(key)
+        if cached is not None:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Cache hit for user input: %s", user_input)
+            return cached
+
+        response, retrieval_context = await self.inner.aget_response(user_input, conversation_history)
+        if response is not None:
+            self._write(key, response, retrieval_context)
+        return response, retrieval_context
+
+    def close_session(self):
+        """Closes the inner client."""
+        self.inner.close_session()
+
+    async def aclose_session(self):
+        """Releases the inner client's loop-bound resources."""
+        await self.inner.aclose_session()
+
+
+# Wrapper that reuses responses of another client for semantically similar inputs
+class SemanticCachingClient(BaseChatbotClient):
+    """
+    Wraps another client and reuses its responses for paraphrased inputs.
+
+    The user input is embedded with a sentence-transformers model and looked up in
+    a FAISS inner-product index of normalized embeddings (i.e. cosine similarity).
+    A cached response is returned when an entry with the same conversation history
+    scores at least `threshold`. The index is persisted under
+    cache_dir/semantic/ on close_session and reloaded on the next run.
+    Requires the optional 'semantic' extra (faiss-cpu, sentence-transformers).
+    """
+    DEFAULT_MODEL = DEFAULT_EMBEDDING_MODEL
+    SEARCH_K = 16 # Nearest neighbours checked for a matching conversation history
+
+    def __init__(
+        self,
+        inner: BaseChatbotClient,
+        threshold: Optional[float] = None,
+        embedding_model: str = DEFAULT_MODEL,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Initializes the SemanticCachingClient.
+
+        Args:
+            inner (BaseChatbotClient): The client used on cache misses.
+            threshold (Optional[float]): Minimum cosine similarity for a hit. Defaults to the
+                                         configured semantic_threshold
+                                         (CHATBOT_EVAL_SEMCACHE_THRESHOLD, 0.9).
+            embedding_model (str): sentence-transformers model used to embed inputs.
+            cache_dir (Optional[str]): Cache directory. Defaults to the configured cache_dir
+                                       (CHATBOT_EVAL_CACHE_DIR) or ~/.cache/chatbot_eval.
+        """
+        # Imported lazily: sentence-transformers pulls in torch, which is slow to import
+        try:
+            import faiss
+            from sentence_transformers import SentenceTransformer
+        except ImportError as e:
+            raise ImportError("SemanticCachingClient requires faiss and sentence-transformers. Install them with: pip install \"chatbot-eval-pkg[semantic]\"") from e
+
+        self.inner = inner
+        self.threshold = threshold if threshold is not None else get_config().semantic_threshold
+        self.endpoint = getattr(inner, "api_endpoint", None) or getattr(inner, "endpoint", None) or type(inner).__name__
+        self._faiss = faiss
+        self.model_name = inner.model_name
+        self._model = SentenceTransformer(embedding_model)
+
+        # One index per (endpoint, chatbot model, embedding model)
+        cache_dir = cache_dir or get_config().cache_dir or DEFAULT_CACHE_DIR
+        index_id = f"{self.endpoint}|{self.model_name}|{embedding_model}" if self.model_name else f"{self.endpoint}|{embedding_model}"
+        name = hashlib.sha256(index_id.encode("utf-8")).hexdigest()[:16]
+        self._index_path = os.path.join(cache_dir, "semantic", f"{name}.faiss")
+        self._entries_path = os.path.join(cache_dir, "semantic", f"{name}.json")
+
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._index, self._entries = self._load()
+        logger.info(f"SemanticCachingClient initialized for endpoint: {self.endpoint} ({len(self._entries)} cached entries, threshold {self.threshold})")
+
+    def _load(self) -> Tuple[Any, List[Dict[str, Any]]]:
+        """Loads the persisted index and entries, or creates an empty index."""
+        if os.path.isfile(self._index_path) and os.path.isfile(self._entries_path):
+            try:
+                index = self._faiss.read_index(self._index_path)
+                with open(self._entries_path, 'r', encoding='utf-8') as f:
+                    entries = json.load(f)
+                if index.ntotal == len(entries):
+                    return index, entries
+                logger.warning("Semantic cache index and entries are out of sync; starting with an empty cache.")
+            except (OSError, RuntimeError, ValueError) as e:
+                logger.warning(f"Could not load semantic cache from {self._index_path}: {e}")
+        return self._faiss.IndexFlatIP(self._model.get_sentence_embedding_dimension()), []
+
+    def _save(self):
+        """Persists the index and entries if anything was added."""
+        with self._lock:
+            if not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self._index_path), exist_ok=True)
+                tmp_index_path = f"{self._index_path}.tmp"
+                self._faiss.write_index(self._index, tmp_index_path)
+                tmp_entries_path = f"{self._entries_path}.tmp"
+                with open(tmp_entries_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._entries, f)
+                os.replace(tmp_index_path, self._index_path)
+                os.replace(tmp_entries_path, self._entries_path)
+                self._dirty = False
+                logger.info(f"Semantic cache saved ({len(self._entries)} entries).")
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"Could not save semantic cache to {self._index_path}: {e}")
+
+    @staticmethod
+    def _history_key(conversation_history: Optional[List[Dict[str, str]]]) -> str:
+        return history_key(conversation_history)
+
+    def _embed(self, text: str) -> Any:
+        """Returns the L2-normalized embedding of text as a (1, dim) float32 array."""
+        return self._model.encode([text], normalize_embeddings=True, convert_to_numpy=True).astype("float32")
+
+    def _lookup(self, embedding: Any, history_key: str) -> Optional[Tuple[Optional[str], Optional[List[str]]]]:
+        """Returns the best cached response above the threshold for the same history, if any."""
+        with self._lock:
+            if self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(embedding, min(self.SEARCH_K, self._index.ntotal))
+            for score, idx in zip(scores[0], ids[0]):
+                if score < self.threshold:
+                    break # Results are sorted by descending similarity
+                entry = self._entries[idx]
+                if entry["history_key"] == history_key:
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Semantic cache hit (similarity %.3f) for input: %s", score, entry['input'])
+                    return entry["response"], entry["retrieval_context"]
+        return None
+
+    def _store(self, embedding: Any, history_key: str, user_input: str, response: str, retrieval_context: Optional[List[str]]):
+        with self._lock:
+            self._index.add(embedding)
+            self._entries.append({
+                "input": user_input,
+                "history_key": history_key,
+                "response": response,
+                "retrieval_context": retrieval_context,
+            })
+            self._dirty = True
+
+    def get_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Returns a cached response for a similar input if present, otherwise queries the inner client."""
+        embedding = self._embed(user_input)
+        history_key = self._history_key(conversation_history)
+        cached = self._lookup(embedding, history_key)
+        if cached is not None:
+            return cached
+
+        response, retrieval_context = self.inner.get_response(user_input, conversation_history)
+        if response is not None:
+            self._store(embedding, history_key, user_input, response, retrieval_context)
+        return response, retrieval_context
+
+    async def aget_response(self, user_input: str, conversation_history: Optional[List[Dict[str, str]]] = None) -> Tuple[Optional[str], Optional[List[str]]]:
+        """Async variant of get_response; embedding runs in the default executor."""
+        loop = asyncio.get_running_loop()
+        embedding = await loop.run_in_executor(None, self._embed, user_input)
+        history_key = self._history_key(conversation_history)
+        cached = self._lookup(embedding, history_key)
+        if cached is not None:
+            return cached
+
+        response, retrieval_context = await self.inner.aget_response(user_input, conversation_history)
+        if response is not None:
+            self._store(embedding, history_key, user_input, response, retrieval_context)
+        return response, retrieval_context
+
+    def close_session(self):
+        """Persists the index and closes the inner client."""
+        self._save()
+        self.inner.close_session()
+
+    async def aclose_session(self):
+        """Releases the inner client's loop-bound resources."""
+        await self.inner.aclose_session()
+
+
 # Factory function or class to create the appropriate client
 def get_chatbot_client(config: Union[Dict[str, Any], Any]) -> BaseChatbotClient:
     """
@@ -219,6 +767,18 @@ def get_chatbot_client(config: Union[Dict[str, Any], Any]) -> BaseChatbotClient:
     Args:
         config: Either a dictionary with keys like 'type', 'api_endpoint', 'api_key'
                 or a pre-configured client object (e.g., FastAPI TestClient).
+                'type' is 'http' (default) or 'http_async' for AsyncHttpClient
+                ('use_async': True with type 'http' is equivalent).
+                HTTP clients also accept 'payload_schema', 'response_key',
+                'model_name' (the model served by the chatbot), 'pool_maxsize'
+                and 'max_retries'; AsyncHttpClient also accepts
+                'max_connections' and 'max_keepalive_connections'.
+                'cache' (bool) wraps the client in a CachingClient; 'cache_dir'
+                overrides its directory. 'semantic_cache' (bool) adds a
+                SemanticCachingClient; 'semantic_cache_threshold' sets its
+                similarity threshold. Omitted cache settings default to
+                get_config() (use_cache, cache_dir, use_semantic_cache and
+                semantic_threshold).
 
     Returns:
         An instance of a BaseChatbotClient subclass.
@@ -226,22 +786,59 @@ def get_chatbot_client(config: Union[Dict[str, Any], Any]) -> BaseChatbotClient:
     Raises:
         ValueError: If the configuration is invalid.
     """
+    client: BaseChatbotClient
     if isinstance(config, dict):
         client_type = config.get("type", "http").lower()
-        if client_type == "http":
-            return HttpClient(
+        if client_type == "http_async" or (client_type == "http" and config.get("use_async")):
+            client = AsyncHttpClient(
+                api_endpoint=config.get("api_endpoint"),
+                api_key=config.get("api_key"),
+                timeout=config.get("timeout", 30),
+                payload_schema=config.get("payload_schema", DEFAULT_PAYLOAD_SCHEMA),
+                response_key=config.get("response_key"),
+                max_connections=config.get("max_connections", 128),
+                max_keepalive_connections=config.get("max_keepalive_connections", 64),
+                model_name=config.get("model_name"),
+                pool_maxsize=config.get("pool_maxsize"),
+                max_retries=config.get("max_retries", 3)
+            )
+        elif client_type == "http":
+            client = HttpClient(
                 api_endpoint=config.get("api_endpoint"),
                 api_key=config.get("api_key"),
-                timeout=config.get("timeout", 30)
+                timeout=config.get("timeout", 30),
+                payload_schema=config.get("payload_schema", DEFAULT_PAYLOAD_SCHEMA),
+                response_key=config.get("response_key"),
+                pool_maxsize=config.get("pool_maxsize", DEFAULT_POOL_MAXSIZE),
+                max_retries=config.get("max_retries", 3),
+                model_name=config.get("model_name")
             )
         # Add other types like 'test_client' if needed, though passing the object directly is simpler
         else:
             raise ValueError(f"Unsupported client type in config: {client_type}")
+        use_cache, cache_dir = config.get("cache"), config.get("cache_dir")
+        use_semantic_cache, semantic_threshold = config.get("semantic_cache"), config.get("semantic_cache_threshold")
     elif hasattr(config, 'post'): # Check if it looks like a test client
         # Assume it's a pre-configured test client object
-        # The user needs to ensure it has the necessary methods (post, json(), raise_for_status())
+        # The user needs to ensure it has the necessary methods (post, status_code, json())
         # We might need an 'endpoint' configuration parameter here too if not root '/'
         logger.info("Received pre-configured client object, wrapping with TestClientWrapper.")
-        return TestClientWrapper(test_client=config)
+        client = TestClientWrapper(test_client=config)
+        use_cache, cache_dir = None, None
+        use_semantic_cache, semantic_threshold = None, None
     else:
         raise ValueError("Invalid chatbot client configuration provided. Expected dict or compatible client object.")
+
+    cfg = get_config() # Fallback for settings the config dict leaves out
+    if use_cache is None:
+        use_cache = cfg.use_cache
+    if use_semantic_cache is None:
+        use_semantic_cache = cfg.use_semantic_cache
+
+    # The semantic cache wraps the exact-match cache, so approximate hits are
+    # never written to the exact-match cache as answers to the new input
+    if use_cache:
+        client = CachingClient(client, cache_dir=cache_dir)
+    if use_semantic_cache:
+        client = SemanticCachingClient(client, threshold=semantic_threshold, cache_dir=cache_dir)
+    return client
@@ -0,0 +1,116 @@
+# src/chatbot_eval_pkg/config.py
+import logging
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from dotenv import dotenv_values, find_dotenv
+
+from .types import _SLOTS
+
+logger = logging.getLogger(__name__)
+
+_TRUTHY = frozenset(['true', '1', 't', 'y', 'yes'])
+
+def _env_flag(name: str, default: str) -> bool:
+    """Parses an on/off environment variable."""
+    return os.getenv(name, default).lower() in _TRUTHY
+
+def _env_positive_int(name: str, default: int) -> int:
+    """Parses an integer environment variable of at least 1, warning about and replacing invalid values."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        logger.warning(f"{name}={raw!r} is not an integer, using {default}.")
+        return default
+    if value < 1:
+        logger.warning(f"{name} must be at least 1 (got {value}), using 1.")
+        return 1
+    return value
+
+def _env_float(name: str, default: float) -> float:
+    """Parses a float environment variable, warning about and replacing invalid values."""
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return float(raw)
+    except ValueError:
+        logger.warning(f"{name}={raw!r} is not a number, using {default}.")
+        return default
+
+@dataclass(frozen=True, **_SLOTS)
+class EvalConfig:
+    """Evaluation settings read from the environment."""
+    chatbot_api_endpoint: Optional[str] = None
+    chatbot_api_key: Optional[str] = None
+    chatbot_payload_schema: Optional[str] = None # None means the client default
+    chatbot_model_name: Optional[str] = None
+    deepeval_evaluation_model: Optional[str] = None
+    run_async: bool = True
+    test_data_dir: str = "test_data"
+    log_level: str = "INFO"
+    include_test_case_details: bool = False
+    use_cache: bool = False # On-disk exact-match response cache (CachingClient)
+    use_semantic_cache: bool = False # SemanticCachingClient
+    cache_dir: Optional[str] = None # None means ~/.cache/chatbot_eval
+    semantic_threshold: float = 0.9
+    eval_concurrency: int = 1 # Test cases the pytest suite evaluates concurrently up front (1: each in its own test)
+    eval_batch: bool = False # Submit the pytest suite to DeepEval in batches
+
+    @classmethod
+    def from_env(cls) -> "EvalConfig":
+        """Builds a config from the current environment variables."""
+        return cls(
+            chatbot_api_endpoint=os.getenv("CHATBOT_API_ENDPOINT"),
+            chatbot_api_key=os.getenv("CHATBOT_API_KEY"),
+            chatbot_payload_schema=os.getenv("CHATBOT_PAYLOAD_SCHEMA") or None,
+            chatbot_model_name=os.getenv("CHATBOT_MODEL_NAME") or None,
+            deepeval_evaluation_model=os.getenv("DEEPEVAL_EVALUATION_MODEL"),
+            run_async=_env_flag("DEEPEVAL_RUN_ASYNC", "true"),
+            test_data_dir=os.getenv("TEST_DATA_DIR", "test_data"),
+            log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
+            include_test_case_details=_env_flag("CHATBOT_EVAL_INCLUDE_DETAILS", "0"),
+            use_cache=_env_flag("CHATBOT_EVAL_CACHE", "0"),
+            use_semantic_cache=_env_flag("CHATBOT_EVAL_SEMCACHE", "0"),
+            cache_dir=os.getenv("CHATBOT_EVAL_CACHE_DIR") or None,
+            semantic_threshold=_env_float("CHATBOT_EVAL_SEMCACHE_THRESHOLD", 0.9),
+            eval_concurrency=_env_positive_int("EVAL_CONCURRENCY", 1),
+            eval_batch=_env_flag("EVAL_BATCH", "false"),
+        )
+
+@lru_cache(maxsize=1)
+def load_env_once() -> bool:
+    """
+    Loads the .env file (if any) into the environment, once per process.
+
+    The file is searched for from the current working directory upwards (not
+    from this module's location, which may be site-packages). Entry points
+    (run_eval, the pytest module, behave steps) all call this, so importing
+    several of them doesn't re-read and re-apply .env. The file is parsed into
+    a dict in one pass and only variables missing from the environment are
+    set; existing ones are not overridden. Returns whether .env set any
+    variable that wasn't already in the environment.
+    """
+    values = dotenv_values(find_dotenv(usecwd=True))
+    set_any = False
+    for key, value in values.items():
+        # Keys without a value (e.g. a bare "KEY") are skipped, as load_dotenv does
+        if value is not None and key not in os.environ:
+            os.environ[key] = value
+            set_any = True
+    return set_any
+
+@lru_cache(maxsize=1)
+def get_config() -> EvalConfig:
+    """
+    Returns the process-wide EvalConfig, read from the environment on first call.
+
+    Call load_env_once() before the first call to pick up a .env file. Use
+    get_config.cache_clear() to re-read the environment (e.g. in tests).
+    """
+    return EvalConfig.from_env()
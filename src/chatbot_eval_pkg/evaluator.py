@@ -1,8 +1,13 @@
 # src/chatbot_eval_pkg/evaluator.py
 import os
+import asyncio
+import functools
+import json
 import logging
+import threading
 import time
-from typing import Dict, Any, List, Optional, Union
+import weakref
+from typing import Dict, Any, List, Optional, Tuple, Union
 
 # DeepEval imports
 from deepeval import evaluate
@@ -12,16 +17,316 @@ from deepeval.dataset import EvaluationDataset # For potential future use
 
 # Package imports
 from .client import BaseChatbotClient # Use the abstract base class
-from .metrics import create_metrics
+from .metrics import MetricsFactory, create_metrics
 from .types import EvaluationResult, MetricResultDetail # Use the result dataclass
+from .config import get_config
+from .cache import SemanticResponseCache
+from .sinks import ResultSink
 
 logger = logging.getLogger(__name__)
 
+def _test_case_fields(test_case_class: type) -> frozenset:
+    """Returns the keyword arguments accepted by a DeepEval test case class (plus 'id')."""
+    try:
+        return frozenset(test_case_class.__annotations__) | {"id"}
+    except (AttributeError, TypeError):
+        return frozenset(("id",))
+
+_LLM_FIELDS = _test_case_fields(LLMTestCase)
+_CONV_FIELDS = _test_case_fields(ConversationalTestCase)
+
+# deepeval.evaluate() resets and saves DeepEval's process-wide test run, so
+# concurrent calls from different threads corrupt each other's runs. Only one
+# evaluate() call runs at a time; chatbot calls still overlap.
+_EVALUATE_LOCK = threading.Lock()
+# Per event loop gate in front of _EVALUATE_LOCK, so coroutines waiting for
+# their turn don't each block a (shared, bounded) executor thread
+_LOOP_EVALUATE_LOCKS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock]" = weakref.WeakKeyDictionary()
+
+def _loop_evaluate_lock() -> asyncio.Lock:
+    """Returns the running event loop's evaluate() gate."""
+    loop = asyncio.get_running_loop()
+    lock = _LOOP_EVALUATE_LOCKS.get(loop)
+    if lock is None:
+        lock = _LOOP_EVALUATE_LOCKS[loop] = asyncio.Lock()
+    return lock
+
+def _emit_result(result: EvaluationResult, sink: Optional[ResultSink]) -> None:
+    """Hands a finished result to sink, then drops its bulky fields, which the sink now holds."""
+    if sink is None:
+        return
+    sink(result)
+    result.test_case_details = None
+    result.chatbot_response = None
+    result.retrieval_context_extracted = None
+
+def _new_result(test_case_data: Dict[str, Any], include_test_case_details: Optional[bool] = None) -> EvaluationResult:
+    """
+    Creates the (initially failed) result object for a test case.
+
+    The test case itself is only attached when include_test_case_details is set
+    (default: the CHATBOT_EVAL_INCLUDE_DETAILS setting), as it can be large.
+    """
+    if include_test_case_details is None:
+        include_test_case_details = get_config().include_test_case_details
+    test_id = test_case_data.get("id", "unknown_id")
+    file_path = test_case_data.get("_file_path", "unknown_file")
+    if logger.isEnabledFor(logging.INFO):
+        file_name = test_case_data.get("_file_basename") or os.path.basename(file_path)
+        logger.info("Starting evaluation for test case ID: %s from file: %s", test_id, file_name)
+
+    return EvaluationResult(
+        id=test_id,
+        success=False, # Default to False
+        duration=0.0,
+        file_path=file_path,
+        test_case_details=test_case_data if include_test_case_details else None,
+    )
+
+def _prepare_test_case(
+    test_case_data: Dict[str, Any],
+    result: EvaluationResult,
+    global_model_config: Optional[Union[str, Dict[str, Any]]],
+    run_async: bool,
+    metrics_factory: Optional[MetricsFactory] = None
+) -> Optional[Tuple[List[BaseMetric], str, Optional[List[Dict[str, str]]]]]:
+    """
+    Instantiates the metrics and extracts the input to send to the chatbot.
+
+    Returns:
+        A (metrics, user_input, conversation_history) tuple, or None if the test
+        case is invalid, in which case result.error is set.
+    """
+    test_id = result.id
+
+    # 1. Instantiate Metrics
+    metric_configs = test_case_data.get("metrics", [])
+    if not metric_configs:
+        result.error = "No metrics defined in the test case."
+        logger.error("Test case %s: No metrics defined.", test_id)
+        return None
+
+    # Pass global config and async flag to metric creation
+    if metrics_factory is not None:
+        metrics: List[BaseMetric] = metrics_factory.get(metric_configs)
+    else:
+        metrics = create_metrics(
+            metric_configs=metric_configs,
+            global_model_config=global_model_config,
+            run_async=run_async
+        )
+    if not metrics:
+         result.error = "Failed to instantiate any metrics from the configuration."
+         logger.error("Test case %s: Failed to instantiate metrics.", test_id)
+         return None
+
+    # 2. Determine Test Case Type and the Chatbot Input
+    if "messages" in test_case_data:
+        messages_data = test_case_data["messages"]
+        if not messages_data or not isinstance(messages_data, list):
+             result.error = "Invalid 'messages' format in conversational test case."
+             logger.error("Test case %s: Invalid 'messages' format.", test_id)
+             return None
+
+        # Test cases conventionally end with the user turn; only scan when they don't
+        last = messages_data[-1]
+        if isinstance(last, dict) and last.get('role') == 'user':
+            last_user_message = last
+        else:
+            last_user_message = next((m for m in reversed(messages_data) if m.get('role') == 'user'), None)
+        if not last_user_message:
+             result.error = "Conversational test case 'messages' does not end with a 'user' role."
+             logger.error("Test case %s: No final user message found.", test_id)
+             return None
+
+        conversation_history = messages_data[:-1] # History excludes the last user message
+        return metrics, last_user_message["content"], conversation_history
+
+    # Single-turn
+    user_input = test_case_data.get("input")
+    if not user_input:
+         result.error = "Missing 'input' field in single-turn test case."
+         logger.error("Test case %s: Missing 'input' field.", test_id)
+         return None
+    return metrics, user_input, None
+
+def _get_response(
+    chatbot_client: BaseChatbotClient,
+    cache: Optional[SemanticResponseCache],
+    user_input: str,
+    conversation_history: Optional[List[Dict[str, str]]]
+) -> Tuple[Optional[str], Optional[List[str]]]:
+    """Queries the chatbot, answering from the semantic response cache when possible."""
+    if cache is None:
+        return chatbot_client.get_response(user_input, conversation_history)
+    embedding = cache.embed(user_input)
+    cached = cache.get(user_input, conversation_history, embedding=embedding)
+    if cached is not None:
+        return cached
+    actual_output, retrieval_context_extracted = chatbot_client.get_response(user_input, conversation_history)
+    if actual_output is not None:
+        cache.put(user_input, conversation_history, actual_output, retrieval_context_extracted, embedding=embedding)
+    return actual_output, retrieval_context_extracted
+
+async def _aget_response(
+    chatbot_client: BaseChatbotClient,
+    cache: Optional[SemanticResponseCache],
+    user_input: str,
+    conversation_history: Optional[List[Dict[str, str]]]
+) -> Tuple[Optional[str], Optional[List[str]]]:
+    """Async variant of _get_response; embedding runs in the default executor."""
+    if cache is None:
+        return await chatbot_client.aget_response(user_input, conversation_history)
+    loop = asyncio.get_running_loop()
+    embedding = await loop.run_in_executor(None, cache.embed, user_input)
+    cached = cache.get(user_input, conversation_history, embedding=embedding)
+    if cached is not None:
+        return cached
+    actual_output, retrieval_context_extracted = await chatbot_client.aget_response(user_input, conversation_history)
+    if actual_output is not None:
+        cache.put(user_input, conversation_history, actual_output, retrieval_context_extracted, embedding=embedding)
+    return actual_output, retrieval_context_extracted
+
+def _build_deepeval_test_case(
+    test_case_data: Dict[str, Any],
+    result: EvaluationResult,
+    user_input: str,
+    actual_output: Optional[str],
+    retrieval_context_extracted: Optional[List[str]]
+) -> Optional[Union[LLMTestCase, ConversationalTestCase]]:
+    """
+    Records the chatbot response on result and builds the DeepEval test case for it.
+
+    Returns:
+        The DeepEval test case, or None if the chatbot call failed, in which case
+        result.error is set.
+    """
+    test_id = result.id
+    result.chatbot_response = actual_output
+    result.retrieval_context_extracted = retrieval_context_extracted
+
+    if actual_output is None:
+        result.error = "Failed to get response from chatbot client."
+        logger.error("Test case %s: Chatbot client call failed.", test_id)
+        return None
+
+    # 3. Create DeepEval Test Case Object
+    # Note: retrieval_context_extracted from the *actual* response might be needed
+    # by some metrics (e.g., faithfulness against actual context). DeepEval's standard
+    # metrics often use the 'retrieval_context' field (ground truth) provided here.
+    # If actual context needs evaluation, custom metrics or adjustments might be needed.
+    get = test_case_data.get # Bound once for the lookups below
+    shared_params = {
+        "actual_output": actual_output,
+        "expected_output": get("expected_output"),
+        "context": get("context"),
+        "retrieval_context": get("retrieval_context"),
+        "id": test_id,
+        "name": test_id, # Lets batched results be matched back to their test case
+        # Pass extracted context if a metric needs it (e.g., custom metric)
+        # This might require mapping it to a specific parameter name in the metric
+        # "actual_retrieval_context": retrieval_context_extracted, # Example
+    }
+
+    deepeval_test_case: Optional[Union[LLMTestCase, ConversationalTestCase]] = None
+    if "messages" in test_case_data:
+         prebuilt_messages = get("_deepeval_messages") # Built by the loader
+         if prebuilt_messages is not None:
+             deepeval_messages = list(prebuilt_messages)
+         else: # Hand-built test case
+             deepeval_messages = [Message(role=m["role"], content=m["content"]) for m in test_case_data["messages"]]
+         # Add the actual assistant response to the messages list for evaluation context
+         deepeval_messages.append(Message(role="assistant", content=actual_output))
+         deepeval_test_case = ConversationalTestCase(
+             messages=deepeval_messages,
+             # Pass other relevant fields if ConversationalTestCase accepts them directly
+             # Check DeepEval documentation for ConversationalTestCase parameters
+             **{k: shared_params[k] for k in shared_params.keys() & _CONV_FIELDS} # Filter params
+         )
+         # Ensure actual_output is explicitly set if needed by metrics accessing it directly
+         deepeval_test_case.actual_output = actual_output
+
+    else: # Single-turn
+        deepeval_test_case = LLMTestCase(
+            input=user_input,
+            **{k: shared_params[k] for k in shared_params.keys() & _LLM_FIELDS} # Filter params
+        )
+    return deepeval_test_case
+
+def _record_deepeval_result(result: EvaluationResult, eval_result_obj: Any) -> None:
+    """Copies DeepEval's outcome for one test case onto result."""
+    test_id = result.id
+    result.success = eval_result_obj.success # Use DeepEval's overall success flag
+
+    # Store detailed metric results in the dataclass structure, noting failures in the same pass
+    detailed_metrics = result.metrics_results = []
+    failed_metrics: List[str] = []
+    for metric_result in eval_result_obj.metrics_results:
+        detail = MetricResultDetail(
+            metric=metric_result.metric, # Name of the metric class/instance
+            score=metric_result.score,
+            threshold=metric_result.threshold,
+            success=metric_result.success,
+            reason=metric_result.reason,
+            error=metric_result.error,
+        )
+        detailed_metrics.append(detail)
+        if not detail.success:
+            failed_metrics.append(detail.metric)
+        log_level = logging.INFO if detail.success else logging.WARNING
+        score_str = f"{detail.score:.4f}" if detail.score is not None else "N/A"
+        logger.log(log_level, "Test case %s - Metric '%s': Score=%s, Threshold=%s, Success=%s, Reason=%s", test_id, detail.metric, score_str, detail.threshold, detail.success, detail.reason)
+
+    if not result.success:
+        result.error = f"One or more metrics failed: {', '.join(failed_metrics)}"
+        logger.warning("Test case %s: Evaluation failed. Failed metrics: %s", test_id, ', '.join(failed_metrics))
+    else:
+        logger.info("Test case %s: Evaluation successful.", test_id)
+
+def _evaluate_response(
+    test_case_data: Dict[str, Any],
+    result: EvaluationResult,
+    metrics: List[BaseMetric],
+    user_input: str,
+    actual_output: Optional[str],
+    retrieval_context_extracted: Optional[List[str]],
+    run_async: bool
+) -> None:
+    """Runs the metrics against the chatbot response and records the outcome on result."""
+    test_id = result.id
+    deepeval_test_case = _build_deepeval_test_case(test_case_data, result, user_input, actual_output, retrieval_context_extracted)
+    if deepeval_test_case is None:
+        return
+
+    # 4. Run Evaluation
+    with _EVALUATE_LOCK:
+        logger.info("Test case %s: Running deepeval.evaluate() %s...", test_id, 'async' if run_async else 'sync')
+        evaluation_results_list = evaluate(
+            test_cases=[deepeval_test_case], # evaluate expects a list
+            metrics=metrics,
+            print_results=False, # We handle reporting
+            run_async=run_async
+        )
+    logger.info("Test case %s: deepeval.evaluate() finished.", test_id)
+
+    # 5. Process Results
+    if not evaluation_results_list:
+         result.error = "DeepEval evaluate() returned no results."
+         logger.error("Test case %s: evaluate() returned empty list.", test_id)
+         return
+
+    # Get the result object for our single test case
+    _record_deepeval_result(result, evaluation_results_list[0])
+
 def evaluate_test_case(
     test_case_data: Dict[str, Any],
     chatbot_client: BaseChatbotClient,
     global_model_config: Optional[Union[str, Dict[str, Any]]] = None,
-    run_async: bool = True
+    run_async: bool = True,
+    include_test_case_details: Optional[bool] = None,
+    cache: Optional[SemanticResponseCache] = None,
+    metrics_factory: Optional[MetricsFactory] = None,
+    sink: Optional[ResultSink] = None
 ) -> EvaluationResult:
     """
     Evaluates a single test case against the chatbot using DeepEval.
@@ -30,187 +335,350 @@ def evaluate_test_case(
         test_case_data: The dictionary representing the loaded JSON test case.
                         Must include 'id', ('input' or 'messages'), and 'metrics'.
                         Can optionally include 'expected_output', 'context',
-                        'retrieval_context'. '_file_path' is added by the loader.
+                        'retrieval_context'. '_file_path' and '_file_basename'
+                        are added by the loader.
         chatbot_client: An instance of a BaseChatbotClient subclass to interact
                         with the target chatbot.
         global_model_config: Optional configuration for a default evaluation model
                              passed to create_metrics.
         run_async: Whether DeepEval should run evaluations asynchronously.
+        include_test_case_details: Attach test_case_data to the result as
+                                   test_case_details. Defaults to the
+                                   CHATBOT_EVAL_INCLUDE_DETAILS setting (off).
+        cache: Optional SemanticResponseCache consulted before the chatbot.
+               Responses are added to it on a miss.
+        metrics_factory: Optional MetricsFactory that reuses the metrics built
+                         for an identical 'metrics' configuration. When given,
+                         its model and async settings are used for metric
+                         creation. Otherwise create_metrics is called directly.
+        sink: Optional callable (e.g. a sinks.JSONLSink) that receives the
+              finished result. The result's test_case_details, chatbot_response
+              and retrieval_context_extracted are cleared afterwards, so long
+              runs don't keep them in memory.
 
     Returns:
         An EvaluationResult object containing the detailed results.
     """
-    start_time = time.time()
-    test_id = test_case_data.get("id", "unknown_id")
-    file_path = test_case_data.get("_file_path", "unknown_file")
-    logger.info(f"Starting evaluation for test case ID: {test_id} from file: {os.path.basename(file_path)}")
+    start_ns = time.perf_counter_ns()
+    result = _new_result(test_case_data, include_test_case_details)
+    test_id = result.id
 
-    # Initialize result object
-    result = EvaluationResult(
-        id=test_id,
-        success=False, # Default to False
-        duration=0.0,
-        file_path=file_path,
-        test_case_details=test_case_data,
-    )
+    try:
+        prepared = _prepare_test_case(test_case_data, result, global_model_config, run_async, metrics_factory)
+        if prepared is not None:
+            metrics, user_input, conversation_history = prepared
+            actual_output, retrieval_context_extracted = _get_response(chatbot_client, cache, user_input, conversation_history)
+            _evaluate_response(test_case_data, result, metrics, user_input, actual_output, retrieval_context_extracted, run_async)
+
+    except Exception as e:
+        logger.exception("Test case %s: Unexpected error during evaluation: %s", test_id, e)
+        result.error = f"Unexpected evaluation error: {str(e)}"
+        result.success = False # Ensure failure on exception
+
+    finally:
+        result.duration = (time.perf_counter_ns() - start_ns) / 1e9
+        logger.info("Test case %s: Evaluation completed in %.2f seconds. Overall Success: %s", test_id, result.duration, result.success)
+
+    _emit_result(result, sink)
+    return result
+
+async def aevaluate_test_case(
+    test_case_data: Dict[str, Any],
+    chatbot_client: BaseChatbotClient,
+    global_model_config: Optional[Union[str, Dict[str, Any]]] = None,
+    run_async: bool = True,
+    include_test_case_details: Optional[bool] = None,
+    cache: Optional[SemanticResponseCache] = None,
+    metrics_factory: Optional[MetricsFactory] = None,
+    sink: Optional[ResultSink] = None
+) -> EvaluationResult:
+    """
+    Async variant of evaluate_test_case.
+
+    The chatbot is queried through chatbot_client.aget_response, so clients with a
+    native async transport (e.g. AsyncHttpClient) do not tie up a thread while
+    waiting. DeepEval's evaluate() is blocking and shares process-wide state,
+    so it runs in the default executor one call at a time: concurrent test
+    cases overlap their chatbot calls, not their evaluations.
+    Arguments and return value are the same as for evaluate_test_case.
+    """
+    start_ns = time.perf_counter_ns()
+    result = _new_result(test_case_data, include_test_case_details)
+    test_id = result.id
 
     try:
-        # 1. Instantiate Metrics
-        metric_configs = test_case_data.get("metrics", [])
-        if not metric_configs:
-            result.error = "No metrics defined in the test case."
-            logger.error(f"Test case {test_id}: No metrics defined.")
-            result.duration = time.time() - start_time
-            return result
-
-        # Pass global config and async flag to metric creation
-        metrics: List[BaseMetric] = create_metrics(
-            metric_configs=metric_configs,
-            global_model_config=global_model_config,
-            run_async=run_async
-        )
-        if not metrics:
-             result.error = "Failed to instantiate any metrics from the configuration."
-             logger.error(f"Test case {test_id}: Failed to instantiate metrics.")
-             result.duration = time.time() - start_time
-             return result
-
-        # 2. Determine Test Case Type and Get Chatbot Response
-        is_conversational = "messages" in test_case_data
-        actual_output: Optional[str] = None
-        retrieval_context_extracted: Optional[List[str]] = None
-        user_input: Optional[str] = None # Define user_input here
-
-        if is_conversational:
-            messages_data = test_case_data["messages"]
-            if not messages_data or not isinstance(messages_data, list):
-                 result.error = "Invalid 'messages' format in conversational test case."
-                 logger.error(f"Test case {test_id}: Invalid 'messages' format.")
-                 result.duration = time.time() - start_time
-                 return result
+        prepared = _prepare_test_case(test_case_data, result, global_model_config, run_async, metrics_factory)
+        if prepared is not None:
+            metrics, user_input, conversation_history = prepared
+            actual_output, retrieval_context_extracted = await _aget_response(chatbot_client, cache, user_input, conversation_history)
+            loop = asyncio.get_running_loop()
+            async with _loop_evaluate_lock():
+                await loop.run_in_executor(None, functools.partial(
+                    _evaluate_response,
+                    test_case_data, result, metrics, user_input, actual_output, retrieval_context_extracted, run_async
+                ))
 
-            last_user_message = next((m for m in reversed(messages_data) if m.get('role') == 'user'), None)
-            if not last_user_message:
-                 result.error = "Conversational test case 'messages' does not end with a 'user' role."
-                 logger.error(f"Test case {test_id}: No final user message found.")
-                 result.duration = time.time() - start_time
-                 return result
-
-            user_input = last_user_message["content"]
-            conversation_history = messages_data[:-1] # History excludes the last user message
-            actual_output, retrieval_context_extracted = chatbot_client.get_response(user_input, conversation_history)
-
-        else: # Single-turn
-            user_input = test_case_data.get("input")
-            if not user_input:
-                 result.error = "Missing 'input' field in single-turn test case."
-                 logger.error(f"Test case {test_id}: Missing 'input' field.")
-                 result.duration = time.time() - start_time
-                 return result
-            actual_output, retrieval_context_extracted = chatbot_client.get_response(user_input)
-
-        result.chatbot_response = actual_output
-        result.retrieval_context_extracted = retrieval_context_extracted
-
-        if actual_output is None:
-            result.error = "Failed to get response from chatbot client."
-            logger.error(f"Test case {test_id}: Chatbot client call failed.")
-            result.duration = time.time() - start_time
-            return result
-
-        # 3. Create DeepEval Test Case Object
-        # Note: retrieval_context_extracted from the *actual* response might be needed
-        # by some metrics (e.g., faithfulness against actual context). DeepEval's standard
-        # metrics often use the 'retrieval_context' field (ground truth) provided here.
-        # If actual context needs evaluation, custom metrics or adjustments might be needed.
-        shared_params = {
-            "actual_output": actual_output,
-            "expected_output": test_case_data.get("expected_output"),
-            "context": test_case_data.get("context"),
-            "retrieval_context": test_case_data.get("retrieval_context"),
-            "id": test_id,
-            # Pass extracted context if a metric needs it (e.g., custom metric)
-            # This might require mapping it to a specific parameter name in the metric
-            # "actual_retrieval_context": retrieval_context_extracted, # Example
-        }
-
-        deepeval_test_case: Optional[Union[LLMTestCase, ConversationalTestCase]] = None
-        if is_conversational:
-             deepeval_messages = [Message(role=m["role"], content=m["content"]) for m in messages_data]
-             # Add the actual assistant response to the messages list for evaluation context
-             deepeval_messages.append(Message(role="assistant", content=actual_output))
-             deepeval_test_case = ConversationalTestCase(
-                 messages=deepeval_messages,
-                 # Pass other relevant fields if ConversationalTestCase accepts them directly
-                 # Check DeepEval documentation for ConversationalTestCase parameters
-                 **{k: v for k, v in shared_params.items() if k in ConversationalTestCase.__annotations__ or k in ['id']} # Filter params
-             )
-             # Ensure actual_output is explicitly set if needed by metrics accessing it directly
-             deepeval_test_case.actual_output = actual_output
-
-        else: # Single-turn
-            if user_input is None: # Should not happen due to earlier check, but satisfy type checker
-                 raise ValueError("User input is None for single-turn case, this should not happen.")
-            deepeval_test_case = LLMTestCase(
-                input=user_input,
-                **{k: v for k, v in shared_params.items() if k in LLMTestCase.__annotations__ or k in ['id']} # Filter params
-            )
-
-
-        # 4. Run Evaluation
-        logger.info(f"Test case {test_id}: Running deepeval.evaluate() {'async' if run_async else 'sync'}...")
+    except Exception as e:
+        logger.exception("Test case %s: Unexpected error during evaluation: %s", test_id, e)
+        result.error = f"Unexpected evaluation error: {str(e)}"
+        result.success = False # Ensure failure on exception
+
+    finally:
+        result.duration = (time.perf_counter_ns() - start_ns) / 1e9
+        logger.info("Test case %s: Evaluation completed in %.2f seconds. Overall Success: %s", test_id, result.duration, result.success)
+
+    _emit_result(result, sink)
+    return result
+
+def _match_batch_results(entries: List[Tuple[EvaluationResult, Any]], evaluation_results_list: List[Any]) -> Optional[List[Any]]:
+    """
+    Returns DeepEval's results reordered to match entries, or None if they can't be matched.
+
+    With run_async, DeepEval returns results in the order the test cases
+    finished, not the order they were submitted. Results are matched on their
+    'index' (the submission position) when DeepEval sets it, else on their
+    'name', which _build_deepeval_test_case sets to the test case ID.
+    """
+    count = len(entries)
+    by_index = {getattr(obj, "index", None): obj for obj in evaluation_results_list}
+    if len(by_index) == count and all(i in by_index for i in range(count)):
+        return [by_index[i] for i in range(count)]
+
+    names = [getattr(deepeval_test_case, "name", None) for _, deepeval_test_case in entries]
+    by_name = {getattr(obj, "name", None): obj for obj in evaluation_results_list}
+    if None not in names and len(set(names)) == count and all(name in by_name for name in names):
+        return [by_name[name] for name in names]
+    return None
+
+def _evaluate_batch(
+    entries: List[Tuple[EvaluationResult, Any]],
+    metrics: List[BaseMetric],
+    run_async: bool
+) -> None:
+    """Runs one deepeval.evaluate() call over test cases sharing the same metrics."""
+    names = [getattr(deepeval_test_case, "name", None) for _, deepeval_test_case in entries]
+    if run_async and (None in names or len(set(names)) != len(names)):
+        # Duplicate test case IDs: keep DeepEval's results in submission order
+        logger.info("Batch has duplicate test case IDs; running deepeval.evaluate() synchronously.")
+        run_async = False
+
+    with _EVALUATE_LOCK:
+        logger.info("Running deepeval.evaluate() %s on a batch of %s test cases...", 'async' if run_async else 'sync', len(entries))
         evaluation_results_list = evaluate(
-            test_cases=[deepeval_test_case], # evaluate expects a list
+            test_cases=[deepeval_test_case for _, deepeval_test_case in entries],
             metrics=metrics,
             print_results=False, # We handle reporting
             run_async=run_async
         )
-        logger.info(f"Test case {test_id}: deepeval.evaluate() finished.")
-
-        # 5. Process Results
-        if not evaluation_results_list:
-             result.error = "DeepEval evaluate() returned no results."
-             logger.error(f"Test case {test_id}: evaluate() returned empty list.")
-             result.duration = time.time() - start_time
-             return result
-
-        # Get the result object for our single test case
-        eval_result_obj = evaluation_results_list[0]
-
-        result.success = eval_result_obj.success # Use DeepEval's overall success flag
-
-        # Store detailed metric results in the dataclass structure
-        detailed_metrics = []
-        for metric_result in eval_result_obj.metrics_results:
-            detail = MetricResultDetail(
-                metric=metric_result.metric, # Name of the metric class/instance
-                score=metric_result.score,
-                threshold=metric_result.threshold,
-                success=metric_result.success,
-                reason=metric_result.reason,
-                error=metric_result.error,
-            )
-            detailed_metrics.append(detail)
-            log_level = logging.INFO if detail.success else logging.WARNING
-            logger.log(log_level, f"Test case {test_id} - Metric '{detail.metric}': Score={detail.score:.4f if detail.score is not None else 'N/A'}, Threshold={detail.threshold}, Success={detail.success}, Reason={detail.reason}")
-
-        result.metrics_results = detailed_metrics
-
-        if not result.success:
-            failed_metrics = [m.metric for m in detailed_metrics if not m.success]
-            result.error = f"One or more metrics failed: {', '.join(failed_metrics)}"
-            logger.warning(f"Test case {test_id}: Evaluation failed. Failed metrics: {', '.join(failed_metrics)}")
-        else:
-            logger.info(f"Test case {test_id}: Evaluation successful.")
+    logger.info("deepeval.evaluate() finished for a batch of %s test cases.", len(entries))
 
+    if not evaluation_results_list or len(evaluation_results_list) != len(entries):
+        for result, _ in entries:
+            result.error = "DeepEval evaluate() returned no result for this test case."
+        logger.error("evaluate() returned %s results for a batch of %s test cases.", len(evaluation_results_list or []), len(entries))
+        return
 
-    except Exception as e:
-        logger.exception(f"Test case {test_id}: Unexpected error during evaluation: {e}")
-        result.error = f"Unexpected evaluation error: {str(e)}"
-        result.success = False # Ensure failure on exception
+    matched = _match_batch_results(entries, evaluation_results_list)
+    if matched is None:
+        if run_async:
+            for result, _ in entries:
+                result.error = "Could not match DeepEval's results to the test cases of this batch."
+            logger.error("Could not match evaluate() results to a batch of %s test cases.", len(entries))
+            return
+        matched = evaluation_results_list # Synchronous runs return results in submission order
+    for (result, _), eval_result_obj in zip(entries, matched):
+        _record_deepeval_result(result, eval_result_obj)
 
-    finally:
-        result.duration = time.time() - start_time
-        logger.info(f"Test case {test_id}: Evaluation completed in {result.duration:.2f} seconds. Overall Success: {result.success}")
+async def aevaluate_all(
+    test_cases_data: List[Dict[str, Any]],
+    chatbot_client: BaseChatbotClient,
+    global_model_config: Optional[Union[str, Dict[str, Any]]] = None,
+    run_async: bool = True,
+    max_concurrency: int = 4,
+    include_test_case_details: Optional[bool] = None,
+    cache: Optional[SemanticResponseCache] = None,
+    metrics_factory: Optional[MetricsFactory] = None,
+    sink: Optional[ResultSink] = None
+) -> List[EvaluationResult]:
+    """
+    Runs aevaluate_test_case for many test cases concurrently.
 
-    return result
+    Chatbot calls of different test cases overlap; their deepeval.evaluate()
+    calls run one at a time (see aevaluate_test_case). To let DeepEval evaluate
+    many test cases concurrently, use aevaluate_test_cases, which submits them
+    in one batched evaluate() call per metric configuration.
+
+    Args:
+        test_cases_data: Loaded JSON test cases (see evaluate_test_case).
+        chatbot_client: An instance of a BaseChatbotClient subclass.
+        global_model_config: Optional configuration for a default evaluation model.
+        run_async: Whether DeepEval should run evaluations asynchronously.
+        max_concurrency: Maximum number of test cases evaluated at the same time.
+        include_test_case_details: See evaluate_test_case.
+        cache: Optional SemanticResponseCache (see evaluate_test_case).
+        metrics_factory: Optional MetricsFactory (see evaluate_test_case). One is
+                         created for the call if omitted.
+        sink: Optional result sink (see evaluate_test_case).
+
+    Returns:
+        One EvaluationResult per test case, in input order.
+    """
+    if metrics_factory is None:
+        metrics_factory = MetricsFactory(global_model_config, run_async)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def bounded(test_case_data: Dict[str, Any]) -> EvaluationResult:
+        async with semaphore:
+            return await aevaluate_test_case(test_case_data, chatbot_client, global_model_config, run_async, include_test_case_details, cache, metrics_factory, sink)
+
+    outcomes = await asyncio.gather(*(bounded(tc) for tc in test_cases_data), return_exceptions=True)
+    results: List[EvaluationResult] = []
+    for test_case_data, outcome in zip(test_cases_data, outcomes):
+        if isinstance(outcome, BaseException):
+            # aevaluate_test_case handles its own errors; this covers e.g. cancellation
+            result = _new_result(test_case_data, include_test_case_details)
+            result.error = f"Unexpected evaluation error: {str(outcome)}"
+            logger.error("Test case %s: %s", result.id, result.error)
+            _emit_result(result, sink)
+            outcome = result
+        results.append(outcome)
+    return results
+
+async def _gather_responses(
+    test_cases_data: List[Dict[str, Any]],
+    results: List[EvaluationResult],
+    chatbot_client: BaseChatbotClient,
+    global_model_config: Optional[Union[str, Dict[str, Any]]],
+    run_async: bool,
+    max_concurrent: int,
+    cache: Optional[SemanticResponseCache] = None,
+    metrics_factory: Optional[MetricsFactory] = None
+) -> List[Optional[Tuple[List[BaseMetric], Any]]]:
+    """
+    Queries the chatbot for all test cases concurrently (at most max_concurrent at a time).
+
+    Returns:
+        Per test case, a (metrics, deepeval test case) tuple, or None if the test
+        case is invalid or the chatbot call failed (result.error is set).
+    """
+    semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def fetch(test_case_data: Dict[str, Any], result: EvaluationResult):
+        start_ns = time.perf_counter_ns()
+        try:
+            prepared = _prepare_test_case(test_case_data, result, global_model_config, run_async, metrics_factory)
+            if prepared is None:
+                return None
+            metrics, user_input, conversation_history = prepared
+            async with semaphore:
+                actual_output, retrieval_context_extracted = await _aget_response(chatbot_client, cache, user_input, conversation_history)
+            deepeval_test_case = _build_deepeval_test_case(test_case_data, result, user_input, actual_output, retrieval_context_extracted)
+            return None if deepeval_test_case is None else (metrics, deepeval_test_case)
+        except Exception as e:
+            logger.exception("Test case %s: Unexpected error during evaluation: %s", result.id, e)
+            result.error = f"Unexpected evaluation error: {str(e)}"
+            return None
+        finally:
+            result.duration = (time.perf_counter_ns() - start_ns) / 1e9
+
+    return await asyncio.gather(*(fetch(tc, r) for tc, r in zip(test_cases_data, results)))
+
+async def aevaluate_test_cases(
+    test_cases_data: List[Dict[str, Any]],
+    chatbot_client: BaseChatbotClient,
+    global_model_config: Optional[Union[str, Dict[str, Any]]] = None,
+    run_async: bool = True,
+    max_concurrent: int = 4,
+    include_test_case_details: Optional[bool] = None,
+    cache: Optional[SemanticResponseCache] = None,
+    metrics_factory: Optional[MetricsFactory] = None,
+    sink: Optional[ResultSink] = None
+) -> List[EvaluationResult]:
+    """
+    Evaluates many test cases with batched deepeval.evaluate() calls.
+
+    All chatbot responses are fetched first (up to max_concurrent at a time).
+    Test cases with the same metric configuration are then submitted to DeepEval
+    together in a single evaluate() call, so DeepEval's setup and judge model
+    client are shared across the batch instead of paid once per test case.
+    evaluate() applies one metric list to all of its test cases, so a suite whose
+    test cases all share their metrics is evaluated in a single call.
+
+    Args:
+        test_cases_data: Loaded JSON test cases (see evaluate_test_case).
+        chatbot_client: An instance of a BaseChatbotClient subclass.
+        global_model_config: Optional configuration for a default evaluation model.
+        run_async: Whether DeepEval should run evaluations asynchronously.
+        max_concurrent: Maximum number of chatbot requests in flight.
+        include_test_case_details: See evaluate_test_case.
+        cache: Optional SemanticResponseCache (see evaluate_test_case).
+        metrics_factory: Optional MetricsFactory (see evaluate_test_case). One is
+                         created for the call if omitted.
+        sink: Optional result sink (see evaluate_test_case).
+
+    Returns:
+        One EvaluationResult per test case, in input order. A duration covers the
+        chatbot call and the evaluate() call of the test case's batch.
+    """
+    loop = asyncio.get_running_loop()
+    if metrics_factory is None:
+        metrics_factory = MetricsFactory(global_model_config, run_async)
+    results = [_new_result(test_case_data, include_test_case_details) for test_case_data in test_cases_data]
+    prepared_cases = await _gather_responses(test_cases_data, results, chatbot_client, global_model_config, run_async, max_concurrent, cache, metrics_factory)
+
+    # Group by metric configuration and test case type: evaluate() applies one
+    # metric list to every test case it is given.
+    batches: Dict[Tuple[str, bool], Tuple[List[BaseMetric], List[Tuple[EvaluationResult, Any]]]] = {}
+    for test_case_data, result, prepared in zip(test_cases_data, results, prepared_cases):
+        if prepared is None:
+            continue
+        metrics, deepeval_test_case = prepared
+        key = (json.dumps(test_case_data.get("metrics"), sort_keys=True, default=str), "messages" in test_case_data)
+        batches.setdefault(key, (metrics, []))[1].append((result, deepeval_test_case))
+
+    for metrics, entries in batches.values():
+        start_ns = time.perf_counter_ns()
+        try:
+            async with _loop_evaluate_lock():
+                await loop.run_in_executor(None, functools.partial(_evaluate_batch, entries, metrics, run_async))
+        except Exception as e:
+            logger.exception("Unexpected error during batched evaluation of %s test cases: %s", len(entries), e)
+            for result, _ in entries:
+                result.error = f"Unexpected evaluation error: {str(e)}"
+                result.success = False
+        finally:
+            batch_duration = (time.perf_counter_ns() - start_ns) / 1e9
+            for result, _ in entries:
+                result.duration += batch_duration
+
+    for result in results:
+        logger.info("Test case %s: Evaluation completed in %.2f seconds. Overall Success: %s", result.id, result.duration, result.success)
+        _emit_result(result, sink)
+    return results
+
+def evaluate_test_cases(
+    test_cases_data: List[Dict[str, Any]],
+    chatbot_client: BaseChatbotClient,
+    global_model_config: Optional[Union[str, Dict[str, Any]]] = None,
+    run_async: bool = True,
+    max_concurrent: int = 4,
+    include_test_case_details: Optional[bool] = None,
+    cache: Optional[SemanticResponseCache] = None,
+    metrics_factory: Optional[MetricsFactory] = None,
+    sink: Optional[ResultSink] = None
+) -> List[EvaluationResult]:
+    """
+    Synchronous wrapper around aevaluate_test_cases.
+
+    Runs on a new event loop, so it must not be called from a running one.
+    Loop-bound client resources (e.g. AsyncHttpClient's httpx client) are
+    released before returning. Arguments and return value are the same as for
+    aevaluate_test_cases.
+    """
+    async def run() -> List[EvaluationResult]:
+        try:
+            return await aevaluate_test_cases(test_cases_data, chatbot_client, global_model_config, run_async, max_concurrent, include_test_case_details, cache, metrics_factory, sink)
+        finally:
+            await chatbot_client.aclose_session()
+
+    return asyncio.run(run())
@@ -1,96 +1,301 @@
 # src/chatbot_eval_pkg/loader.py
 import os
-import json
+import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+import pickle
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Iterator, List, Dict, Any, Optional, Tuple
+
+from . import _json
+
+try:
+    import fastjsonschema # Optional: compiled test case validation, see the 'fast' extra
+except ImportError:
+    fastjsonschema = None
+
+try:
+    from filelock import FileLock # Optional: serializes cache writes across processes
+except ImportError:
+    FileLock = None
 
 logger = logging.getLogger(__name__)
 
-def load_test_cases_from_directory(directory: str) -> List[Dict[str, Any]]:
+_JSON_SUFFIXES = (".json", ".JSON")
+DEFAULT_LOAD_WORKERS = min(32, (os.cpu_count() or 1) * 4) # File reads are I/O bound
+_PICKLE_CACHE_FORMAT = b"1" # Bump when the shape of loaded test cases changes
+
+# Required shape of a test case file (F1.1, F1.2, F1.3)
+_TEST_CASE_SCHEMA = {
+    "type": "object",
+    "required": ["id", "metrics"],
+    "properties": {
+        "metrics": {"type": "array"},
+    },
+    "anyOf": [{"required": ["input"]}, {"required": ["messages"]}],
+}
+_validate_schema = fastjsonschema.compile(_TEST_CASE_SCHEMA) if fastjsonschema is not None else None
+
+def _validation_error(data: Any) -> Optional[str]:
+    """Returns why data is not a valid test case, or None if it is."""
+    if not isinstance(data, dict):
+        return "Top-level JSON value must be an object."
+    if "id" not in data:
+        return "Missing required field 'id'."
+    if "input" not in data and "messages" not in data:
+        return "Missing required field 'input' or 'messages'."
+    if "metrics" not in data or not isinstance(data["metrics"], list):
+        return "Missing or invalid 'metrics' field (must be a list)."
+    return None
+
+def _is_valid_test_case(data: Any) -> bool:
+    """Checks data against _TEST_CASE_SCHEMA, with the compiled validator when available."""
+    if _validate_schema is None:
+        return _validation_error(data) is None
+    try:
+        _validate_schema(data)
+    except fastjsonschema.JsonSchemaException:
+        return False
+    return True
+
+def _attach_deepeval_messages(data: Dict[str, Any]) -> None:
+    """
+    Builds the DeepEval Message objects for a conversational test case once at load time.
+
+    Stored as an immutable tuple under '_deepeval_messages', so the evaluator (and
+    every cached copy of the test case) reuses them instead of rebuilding them.
+    """
+    messages = data.get("messages")
+    if not isinstance(messages, list):
+        return
+    try:
+        from deepeval.test_case import Message # Imported lazily to keep the loader light
+        data["_deepeval_messages"] = tuple(Message(role=m["role"], content=m["content"]) for m in messages)
+    except (ImportError, KeyError, TypeError) as e:
+        # Malformed messages are reported by the evaluator, which rebuilds them itself
+        logger.debug("Not precomputing DeepEval messages for test case '%s': %s", data.get('id'), e)
+
+def _parse_one(file_path: str) -> Optional[Dict[str, Any]]:
+    """Reads and validates one test case file. Returns None if it is invalid."""
+    filename = os.path.basename(file_path)
+    logger.debug("Attempting to load test case file: %s", file_path)
+    try:
+        with open(file_path, 'rb') as f:
+            data = _json.loads(f.read())
+    except _json.JSONDecodeError as e:
+        logger.error("Error decoding JSON from file %s: %s", file_path, e)
+        return None
+    except Exception as e:
+        logger.error("Error loading file %s: %s", file_path, e)
+        return None
+
+    # Basic validation. The detailed checks only run to explain a rejected file.
+    if not _is_valid_test_case(data):
+        reason = _validation_error(data) or "Does not match the test case schema."
+        if isinstance(data, dict) and "id" in data:
+            logger.warning("Skipping file %s (id: %s): %s", filename, data.get('id'), reason)
+        else:
+            logger.warning("Skipping file %s: %s", filename, reason)
+        return None
+
+    _attach_deepeval_messages(data)
+    # Add file path for reference during testing/reporting
+    data['_file_path'] = file_path
+    data['_file_basename'] = filename # Saves reporters from recomputing it per log line
+    logger.debug("Successfully loaded test case '%s' from %s", data.get('id'), filename)
+    return data
+
+def iter_test_cases_from_directory(directory: str, parallel: bool = True, max_workers: int = DEFAULT_LOAD_WORKERS) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily loads JSON test case files from a specified directory.
+
+    Files are yielded in file name order as the iterator is consumed, so
+    callers can start evaluating before the whole directory has been parsed.
+    The fixed order also gives every pytest-xdist worker the same collection.
+    With `parallel`, files are read and parsed ahead on a thread pool.
+
+    Args:
+        directory (str): The path to the directory containing JSON test files.
+        parallel (bool): Read files concurrently on `max_workers` threads.
+        max_workers (int): Number of reader threads when `parallel` is set.
+
+    Yields:
+        Dict[str, Any]: Each valid test case (as a dictionary). Yields nothing
+                        if the directory doesn't exist, can't be listed or contains
+                        no valid JSON files.
+    """
+    if not os.path.isdir(directory):
+        logger.error("Test data directory not found: %s", directory)
+        return
+
+    logger.info("Loading test cases from directory: %s", directory)
+    try:
+        with os.scandir(directory) as entries:
+            # is_file() uses the type reported by the directory listing, so no extra stat per entry
+            file_paths = [entry.path for entry in entries if entry.name.endswith(_JSON_SUFFIXES) and entry.is_file()]
+    except OSError as e: # e.g. PermissionError on a directory the user can't read
+        logger.error("Could not list test data directory %s: %s", directory, e)
+        return
+    file_paths.sort() # scandir order is filesystem dependent
+
+    loaded = 0
+    if parallel and len(file_paths) > 1:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for data in executor.map(_parse_one, file_paths):
+                if data is not None:
+                    loaded += 1
+                    yield data
+    else:
+        for file_path in file_paths:
+            data = _parse_one(file_path)
+            if data is not None:
+                loaded += 1
+                yield data
+
+    logger.info("Loaded %s test cases.", loaded)
+
+def load_test_cases_from_directory(directory: str, parallel: bool = True) -> List[Dict[str, Any]]:
     """
     Loads all JSON test case files from a specified directory.
 
     Args:
         directory (str): The path to the directory containing JSON test files.
+        parallel (bool): Read files concurrently on a thread pool.
 
     Returns:
         List[Dict[str, Any]]: A list of loaded test cases (as dictionaries).
                                Returns an empty list if the directory doesn't exist
                                or contains no valid JSON files.
     """
-    test_cases = []
-    if not os.path.isdir(directory):
-        logger.error(f"Test data directory not found: {directory}")
-        return test_cases
+    return list(iter_test_cases_from_directory(directory, parallel=parallel))
 
-    logger.info(f"Loading test cases from directory: {directory}")
-    for filename in os.listdir(directory):
-        if filename.lower().endswith(".json"):
-            file_path = os.path.join(directory, filename)
-            logger.debug(f"Attempting to load test case file: {file_path}")
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    # Basic validation (F1.1, F1.2, F1.3)
-                    if "id" not in data:
-                        logger.warning(f"Skipping file {filename}: Missing required field 'id'.")
-                        continue
-                    if "input" not in data and "messages" not in data:
-                         logger.warning(f"Skipping file {filename} (id: {data.get('id')}): Missing required field 'input' or 'messages'.")
-                         continue
-                    if "metrics" not in data or not isinstance(data["metrics"], list):
-                         logger.warning(f"Skipping file {filename} (id: {data.get('id')}): Missing or invalid 'metrics' field (must be a list).")
-                         continue
-
-                    # Add file path for reference during testing/reporting
-                    data['_file_path'] = file_path
-                    test_cases.append(data)
-                    logger.debug(f"Successfully loaded test case '{data.get('id')}' from {filename}")
-
-            except json.JSONDecodeError as e:
-                logger.error(f"Error decoding JSON from file {file_path}: {e}")
-            except Exception as e:
-                logger.error(f"Error loading file {file_path}: {e}")
-
-    logger.info(f"Loaded {len(test_cases)} test cases.")
-    return test_cases
-
-def load_test_case_from_file(file_path: str) -> Optional[Dict[str, Any]]:
+def load_test_case_from_file(file_path: str, cache: bool = True) -> Optional[Dict[str, Any]]:
     """
     Loads a single JSON test case file.
 
+    Parsed files are cached in-process by path and modification time, so loading
+    an unchanged file again (e.g. from behave and run_eval in one process) skips
+    the read and parse. Each call returns a shallow copy of the cached test case.
+
     Args:
         file_path (str): The path to the JSON test file.
+        cache (bool): Use the in-process cache. Pass False when each file is
+                      loaded once and should not stay in memory afterwards.
 
     Returns:
         Optional[Dict[str, Any]]: The loaded test case (as a dictionary) or None if loading fails.
     """
-    logger.debug(f"Attempting to load single test case file: {file_path}")
+    logger.debug("Attempting to load single test case file: %s", file_path)
     if not os.path.isfile(file_path):
-        logger.error(f"Test case file not found: {file_path}")
+        logger.error("Test case file not found: %s", file_path)
         return None
+    if not cache:
+        return _parse_one(file_path)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            # Basic validation (F1.1, F1.2, F1.3)
-            if "id" not in data:
-                logger.warning(f"Skipping file {file_path}: Missing required field 'id'.")
-                return None
-            if "input" not in data and "messages" not in data:
-                 logger.warning(f"Skipping file {file_path} (id: {data.get('id')}): Missing required field 'input' or 'messages'.")
-                 return None
-            if "metrics" not in data or not isinstance(data["metrics"], list):
-                 logger.warning(f"Skipping file {file_path} (id: {data.get('id')}): Missing or invalid 'metrics' field (must be a list).")
-                 return None
-
-            # Add file path for reference
-            data['_file_path'] = file_path
-            logger.debug(f"Successfully loaded test case '{data.get('id')}' from {file_path}")
-            return data
-
-    except json.JSONDecodeError as e:
-        logger.error(f"Error decoding JSON from file {file_path}: {e}")
-        return None
-    except Exception as e:
-        logger.error(f"Error loading file {file_path}: {e}")
+        mtime_ns = os.stat(file_path).st_mtime_ns
+    except OSError as e:
+        logger.error("Error loading file %s: %s", file_path, e)
         return None
+    data = _load_test_case_from_file_cached(file_path, mtime_ns)
+    return dict(data) if data is not None else None
+
+def _directory_fingerprint(directory: str) -> str:
+    """Hashes the name, size and modification time of every JSON file in directory."""
+    fingerprint = hashlib.blake2b(_PICKLE_CACHE_FORMAT, digest_size=16)
+    fingerprint.update(os.path.abspath(directory).encode("utf-8") + b"\0" + directory.encode("utf-8"))
+    with os.scandir(directory) as entries:
+        files = sorted((entry.name, entry.stat()) for entry in entries if entry.name.endswith(_JSON_SUFFIXES) and entry.is_file())
+    for name, st in files:
+        fingerprint.update(f"\n{name}\0{st.st_size}\0{st.st_mtime_ns}".encode("utf-8"))
+    return fingerprint.hexdigest()
+
+def _remove_stale_caches(cache_dir: str, keep: str) -> None:
+    """Deletes the test_cases-*.pkl files in cache_dir other than keep, with their .lock files."""
+    keep_names = {os.path.basename(keep), os.path.basename(keep) + ".lock"} # keep's lock is held by the caller
+    try:
+        with os.scandir(cache_dir) as entries:
+            stale = [entry.path for entry in entries
+                     if entry.name.startswith("test_cases-") and entry.name.endswith((".pkl", ".pkl.lock")) and entry.name not in keep_names]
+    except OSError as e:
+        logger.debug("Could not list test case cache directory %s: %s", cache_dir, e)
+        return
+    for path in stale:
+        try:
+            os.unlink(path)
+            logger.debug("Removed stale test case cache %s", path)
+        except OSError as e: # Already removed by another worker, or not ours to delete
+            logger.debug("Could not remove stale test case cache %s: %s", path, e)
+
+def load_test_cases_cached(directory: str, cache_dir: str, parallel: bool = True) -> List[Dict[str, Any]]:
+    """
+    Loads all test cases from a directory through an on-disk pickle cache.
+
+    Meant for processes that load the same suite over and over, such as
+    pytest-xdist workers: the first one parses the files and writes
+    `cache_dir/test_cases-<fingerprint>.pkl`, the others unpickle it. The
+    fingerprint covers each JSON file's name, size and modification time, so
+    editing, adding or removing a file invalidates the cache; the caches it
+    replaces are deleted when a new one is written. When filelock is
+    installed, concurrent writers wait for each other instead of all parsing.
+
+    Only point cache_dir at a directory you trust: it is read with pickle.
+
+    Args:
+        directory (str): The path to the directory containing JSON test files.
+        cache_dir (str): Directory for the pickle files. Created if needed.
+        parallel (bool): Read files concurrently on a thread pool on a cache miss.
+
+    Returns:
+        List[Dict[str, Any]]: The loaded test cases, as load_test_cases_from_directory.
+    """
+    if not os.path.isdir(directory):
+        return load_test_cases_from_directory(directory, parallel=parallel) # Logs the error
+
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        cache_path = os.path.join(cache_dir, f"test_cases-{_directory_fingerprint(directory)}.pkl")
+    except OSError as e:
+        logger.warning("Test case cache unavailable (%s); loading %s directly.", e, directory)
+        return load_test_cases_from_directory(directory, parallel=parallel)
+
+    lock = FileLock(cache_path + ".lock") if FileLock is not None else nullcontext()
+    with lock:
+        try:
+            with open(cache_path, "rb") as f:
+                test_cases = pickle.load(f)
+            logger.info("Loaded %s test cases from cache %s", len(test_cases), cache_path)
+            return test_cases
+        except FileNotFoundError:
+            pass
+        except Exception as e: # Truncated or incompatible cache file: rebuild it
+            logger.warning("Ignoring unreadable test case cache %s: %s", cache_path, e)
+
+        test_cases = load_test_cases_from_directory(directory, parallel=parallel)
+        try:
+            # Write to a temporary file and rename, so readers never see a partial pickle
+            fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    pickle.dump(test_cases, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            _remove_stale_caches(cache_dir, keep=cache_path)
+        except Exception as e:
+            logger.warning("Could not write test case cache %s: %s", cache_path, e)
+        return test_cases
+
+# Parsed test case per path, with the modification time it was parsed at. Keyed
+# by path only, so an edited file replaces its old version instead of adding one.
+_FILE_CACHE: Dict[str, Tuple[int, Optional[Dict[str, Any]]]] = {}
+
+def _load_test_case_from_file_cached(file_path: str, mtime_ns: int) -> Optional[Dict[str, Any]]:
+    """Parses and validates a test case file, reusing the cached parse while mtime_ns is unchanged."""
+    cached = _FILE_CACHE.get(file_path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    data = _parse_one(file_path)
+    _FILE_CACHE[file_path] = (mtime_ns, data)
+    return data
@@ -1,7 +1,9 @@
 # src/chatbot_eval_pkg/metrics.py
+import copy
+import json
 import logging
 import inspect
-from typing import List, Dict, Any, Optional, Type
+from typing import FrozenSet, List, Dict, Any, Optional, Tuple, Type, Union
 
 # Import specific model types if needed for type hinting or instantiation logic
 # Example: from deepeval.models import OpenAIModel, BedrockModel
@@ -36,6 +38,41 @@ DEFAULT_METRIC_NAME_TO_CLASS: Dict[str, Type[BaseMetric]] = {
     # "KnowledgeRetention": deepeval.metrics.KnowledgeRetentionMetric, # Example
 }
 
+# --- Caches ---
+# Constructor parameter names per metric class (inspect.signature is slow)
+_INIT_PARAMS_CACHE: Dict[type, FrozenSet[str]] = {}
+# Prototype metric instances per (class, constructor args, run_async). Metrics
+# record per-measurement state (score, reason, ...) on themselves, so callers get
+# a shallow copy of the prototype; the judge model and other config are shared.
+_METRIC_INSTANCE_CACHE: Dict[Tuple[Any, ...], BaseMetric] = {}
+
+# Metric config keys that are not passed to the metric constructor as-is
+_RESERVED_CONFIG_KEYS = frozenset(("name", "model"))
+
+def _get_init_params(metric_class: type) -> FrozenSet[str]:
+    """Returns the names of metric_class.__init__'s parameters, cached per class."""
+    init_params = _INIT_PARAMS_CACHE.get(metric_class)
+    if init_params is None:
+        init_params = frozenset(inspect.signature(metric_class.__init__).parameters)
+        _INIT_PARAMS_CACHE[metric_class] = init_params
+    return init_params
+
+def _cached_metric(metric_class: type, metric_args: Dict[str, Any], run_async: bool) -> BaseMetric:
+    """Returns a copy of the cached metric built from metric_args, constructing it on first use."""
+    key: Optional[Tuple[Any, ...]] = (metric_class, tuple(sorted(metric_args.items(), key=lambda kv: kv[0])), run_async)
+    try:
+        hash(key)
+    except TypeError:
+        key = None # Unhashable argument (e.g. a list): construct directly, uncached
+
+    if key is None:
+        return metric_class(**metric_args)
+    prototype = _METRIC_INSTANCE_CACHE.get(key)
+    if prototype is None:
+        prototype = metric_class(**metric_args)
+        _METRIC_INSTANCE_CACHE[key] = prototype
+    return copy.copy(prototype)
+
 def _instantiate_evaluation_model(model_config: Union[str, Dict[str, Any]]) -> Optional[Any]:
     """
     Attempts to instantiate an evaluation model based on config.
@@ -107,7 +144,9 @@ def create_metrics(
                         DeepEval BaseMetric subclasses. Defaults to internal mapping.
 
     Returns:
-        A list of instantiated DeepEval metric objects.
+        A list of instantiated DeepEval metric objects. Metrics with identical
+        hashable arguments are constructed once and returned as shallow copies,
+        so a custom metric must not mutate shared configuration during measure().
     """
     metrics = []
     active_metric_mapping = metric_mapping or DEFAULT_METRIC_NAME_TO_CLASS
@@ -128,18 +167,15 @@ def create_metrics(
 
         try:
             # --- Prepare arguments for the specific MetricClass ---
-            init_params = inspect.signature(MetricClass.__init__).parameters
-            metric_args = {}
+            init_params = _get_init_params(MetricClass)
 
             # 1. Get parameters directly from the metric's JSON config
-            #    (excluding 'name' which is used for lookup)
-            for key, value in config.items():
-                if key != "name" and key in init_params:
-                    metric_args[key] = value
-                elif key == "model": # Handle 'model' specifically for override
-                    pass # Will be handled in step 3
-                elif key not in init_params:
-                     logger.debug(f"Parameter '{key}' from JSON config is not in {metric_name}.__init__, ignoring.")
+            #    (excluding 'name' which is used for lookup and 'model' which is handled in step 3)
+            config_keys = config.keys() - _RESERVED_CONFIG_KEYS
+            metric_args = {key: config[key] for key in config_keys & init_params}
+            if logger.isEnabledFor(logging.DEBUG):
+                for key in config_keys - init_params:
+                    logger.debug(f"Parameter '{key}' from JSON config is not in {metric_name}.__init__, ignoring.")
 
 
             # 2. Add/Override global configurations if not already set by metric config
@@ -183,7 +219,7 @@ def create_metrics(
 
             # --- Instantiate the metric ---
             logger.debug(f"Instantiating {metric_name} with args: {metric_args}")
-            metric_instance = MetricClass(**metric_args)
+            metric_instance = _cached_metric(MetricClass, metric_args, run_async)
             metrics.append(metric_instance)
 
         except TypeError as e:
@@ -193,3 +229,54 @@ def create_metrics(
 
     logger.info(f"Successfully created {len(metrics)} metric instances.")
     return metrics
+
+
+class MetricsFactory:
+    """
+    Builds metric lists once per distinct metric configuration and reuses them.
+
+    Test cases in a suite usually share the same 'metrics' block, so metrics are
+    created with create_metrics on the first request for a configuration and
+    handed out as shallow copies afterwards (metrics record per-measurement state
+    on themselves). Configurations that are not JSON-serializable are built
+    directly every time.
+    """
+    def __init__(
+        self,
+        global_model_config: Optional[Union[str, Dict[str, Any]]] = None,
+        run_async: bool = True,
+        metric_mapping: Optional[Dict[str, Type[BaseMetric]]] = None
+    ):
+        """
+        Initializes the MetricsFactory.
+
+        Args:
+            global_model_config: Default evaluation model, as for create_metrics.
+            run_async: Whether metrics run asynchronously, as for create_metrics.
+            metric_mapping: Optional metric name mapping, as for create_metrics.
+        """
+        self.global_model_config = global_model_config
+        self.run_async = run_async
+        self.metric_mapping = metric_mapping
+        self._cache: Dict[str, List[BaseMetric]] = {}
+
+    def _create(self, metric_configs: List[Dict[str, Any]]) -> List[BaseMetric]:
+        return create_metrics(
+            metric_configs=metric_configs,
+            global_model_config=self.global_model_config,
+            run_async=self.run_async,
+            metric_mapping=self.metric_mapping
+        )
+
+    def get(self, metric_configs: List[Dict[str, Any]]) -> List[BaseMetric]:
+        """Returns metrics for metric_configs, built on first use of this configuration."""
+        try:
+            key = json.dumps(metric_configs, sort_keys=True)
+        except (TypeError, ValueError):
+            return self._create(metric_configs) # Not JSON-safe: no stable key
+
+        metrics = self._cache.get(key)
+        if metrics is None:
+            metrics = self._create(metric_configs)
+            self._cache[key] = metrics
+        return [copy.copy(metric) for metric in metrics]
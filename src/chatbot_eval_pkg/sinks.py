@@ -0,0 +1,80 @@
+# src/chatbot_eval_pkg/sinks.py
+import logging
+import threading
+from dataclasses import asdict, replace
+from typing import Any, Callable, Dict
+
+from . import _json
+from .types import EvaluationResult
+
+logger = logging.getLogger(__name__)
+
+# Called with each finished EvaluationResult (see the evaluator's sink= parameter)
+ResultSink = Callable[[EvaluationResult], None]
+
+def result_to_dict(result: EvaluationResult) -> Dict[str, Any]:
+    """
+    Converts an EvaluationResult to a JSON-serializable dictionary.
+
+    Loader-private keys (prefixed with '_', e.g. prebuilt DeepEval messages) are
+    dropped from test_case_details before asdict() deep-copies it.
+    """
+    details = result.test_case_details
+    if details:
+        result = replace(result, test_case_details={k: v for k, v in details.items() if not k.startswith("_")})
+    return asdict(result)
+
+class JSONLSink:
+    """
+    Appends evaluation results to a JSON Lines file as they finish.
+
+    Pass an instance as `sink=` to the evaluator functions so results are written
+    out incrementally instead of being kept in memory until the end of a run.
+    Writes are buffered and flushed every `flush_every` records and on close().
+    Safe to share between threads.
+    """
+    def __init__(self, path: str, flush_every: int = 100):
+        """
+        Initializes the JSONLSink.
+
+        Args:
+            path (str): File to append to. Created if it doesn't exist.
+            flush_every (int): Number of records written between flushes.
+        """
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self._file = open(path, "ab")
+        self._pending = 0
+        self._lock = threading.Lock()
+        logger.info(f"Writing evaluation results to {path}")
+
+    def __call__(self, result: EvaluationResult) -> None:
+        self.write_record(result_to_dict(result))
+
+    def write_record(self, record: Dict[str, Any]) -> None:
+        """Appends an already converted record (see result_to_dict)."""
+        line = _json.dumps(record) + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def flush(self) -> None:
+        """Flushes buffered records to disk."""
+        with self._lock:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self) -> None:
+        """Flushes and closes the file. Safe to call more than once."""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def __enter__(self) -> "JSONLSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
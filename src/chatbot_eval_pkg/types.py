@@ -1,10 +1,16 @@
 # src/chatbot_eval_pkg/types.py
+import os
+import sys
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional
 
-@dataclass
+# Slotted dataclasses drop the per-instance __dict__, which adds up when a run
+# keeps thousands of results alive. dataclass(slots=True) needs Python 3.10+.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+@dataclass(frozen=True, **_SLOTS)
 class MetricResultDetail:
-    """Detailed results for a single metric."""
+    """Detailed results for a single metric. Immutable once recorded."""
     metric: str
     score: Optional[float] = None
     threshold: Optional[float] = None
@@ -12,9 +18,41 @@ class MetricResultDetail:
     reason: Optional[str] = None
     error: Optional[str] = None
 
-@dataclass
+@dataclass(frozen=True, **_SLOTS)
+class TestCaseRef:
+    """
+    Lightweight handle on a loaded test case: its ID, source file and pytest ID.
+
+    Test runners can hold one of these per case (e.g. as parametrization IDs)
+    instead of looking fields up in every test case dict.
+    """
+    __test__ = False # Not a pytest test class despite the name
+
+    id: str
+    file_path: str
+    file_name: str
+    pytest_id: str
+
+    @classmethod
+    def from_test_case(cls, test_case_data: Dict[str, Any]) -> "TestCaseRef":
+        """Builds the reference for a test case dict produced by the loader."""
+        get = test_case_data.get
+        test_id = get("id", "no_id")
+        file_path = get("_file_path", "unknown")
+        file_name = get("_file_basename") or os.path.basename(file_path)
+        return cls(id=test_id, file_path=file_path, file_name=file_name, pytest_id=f"{file_name}[{test_id}]")
+
+@dataclass(**_SLOTS)
 class EvaluationResult:
-    """Structured result for a single test case evaluation."""
+    """
+    Structured result for a single test case evaluation.
+
+    test_case_details holds the loaded test case only when requested
+    (include_test_case_details / CHATBOT_EVAL_INCLUDE_DETAILS). Keeping it for
+    thousands of results retains every conversation and retrieval context in
+    memory; reporters that need it can re-read file_path with
+    load_test_case_from_file instead.
+    """
     id: str
     success: bool
     duration: float
@@ -23,4 +61,4 @@ class EvaluationResult:
     metrics_results: List[MetricResultDetail] = field(default_factory=list)
     error: Optional[str] = None
     file_path: Optional[str] = None # Original file path for reference
-    test_case_details: Optional[Dict[str, Any]] = None # Original test case data
+    test_case_details: Optional[Dict[str, Any]] = None # Original test case data, if requested
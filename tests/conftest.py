@@ -0,0 +1,47 @@
+# tests/conftest.py
+"""
+Writes the pytest suite's evaluation results to a JSON Lines file.
+
+With `--output-jsonl=PATH` (registered in the rootdir conftest.py),
+test_chatbot_evaluation attaches its result to the test report as the
+'eval_result' user property and pytest_runtest_logreport appends it to PATH,
+one result_to_dict record per line. Under pytest-xdist the reports are logged
+in the controller process, so only it writes the file.
+"""
+import pytest
+from typing import Callable, Optional
+
+from chatbot_eval_pkg.sinks import JSONLSink, result_to_dict
+from chatbot_eval_pkg.types import EvaluationResult
+
+_sink: Optional[JSONLSink] = None
+
+def pytest_configure(config: pytest.Config):
+    global _sink
+    path = config.getoption("output_jsonl")
+    if path and not hasattr(config, "workerinput"): # xdist workers send their reports to the controller
+        _sink = JSONLSink(path)
+
+def pytest_unconfigure(config: pytest.Config):
+    global _sink
+    if _sink is not None:
+        _sink.close()
+        _sink = None
+
+def pytest_runtest_logreport(report: pytest.TestReport):
+    if _sink is None or report.when != "call":
+        return
+    for name, value in report.user_properties:
+        if name == "eval_result":
+            _sink.write_record(value)
+
+@pytest.fixture
+def record_eval_result(request: pytest.FixtureRequest) -> Callable[[EvaluationResult], None]:
+    """Returns a function that attaches an EvaluationResult to the test report when --output-jsonl is given."""
+    enabled = request.config.getoption("output_jsonl") is not None
+
+    def record(result: EvaluationResult) -> None:
+        if enabled: # Otherwise keep the reports (held by pytest until the end) small
+            request.node.user_properties.append(("eval_result", result_to_dict(result)))
+
+    return record
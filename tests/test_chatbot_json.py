@@ -1,48 +1,81 @@
 # tests/test_chatbot_json.py
 import pytest
+import asyncio
 import os
+import stat
 import logging
-from dotenv import load_dotenv
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+from chatbot_eval_pkg.config import get_config, load_env_once
 
-# Load environment variables from .env file if it exists
-load_dotenv()
+# Load environment variables from .env file if it exists (once per process)
+load_env_once()
 
 # Import from the new package structure
-from chatbot_eval_pkg.loader import load_test_cases_from_directory
-from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient
-from chatbot_eval_pkg.evaluator import evaluate_test_case
-from chatbot_eval_pkg.types import EvaluationResult, MetricResultDetail # Import result types
+from chatbot_eval_pkg.loader import load_test_case_from_file, load_test_cases_cached
+from chatbot_eval_pkg.client import get_chatbot_client, BaseChatbotClient, DEFAULT_PAYLOAD_SCHEMA
+from chatbot_eval_pkg.evaluator import aevaluate_all, aevaluate_test_cases, evaluate_test_case
+from chatbot_eval_pkg.types import EvaluationResult, MetricResultDetail, TestCaseRef # Import result types
 
 logger = logging.getLogger(__name__)
 
 # --- Configuration ---
-# Get configuration from environment variables (ensure these are set)
-TEST_DATA_DIR = os.getenv("TEST_DATA_DIR", "test_data") # Default to 'test_data' relative to root
-CHATBOT_API_ENDPOINT = os.getenv("CHATBOT_API_ENDPOINT")
-CHATBOT_API_KEY = os.getenv("CHATBOT_API_KEY")
+# Read once from environment variables (ensure these are set), see chatbot_eval_pkg.config
+CFG = get_config()
+TEST_DATA_DIR = CFG.test_data_dir # Default to 'test_data' relative to root
+# Parsed test cases are shared between pytest-xdist workers through this cache
+TEST_CASE_CACHE_DIR = os.path.join(".pytest_cache", "chatbot_eval")
+CHATBOT_API_ENDPOINT = CFG.chatbot_api_endpoint
+CHATBOT_API_KEY = CFG.chatbot_api_key
 # Optional: Configure evaluation model via env var
-DEEPEVAL_EVALUATION_MODEL = os.getenv("DEEPEVAL_EVALUATION_MODEL")
-# Optional: Configure async mode via env var (convert string to bool)
-DEEPEVAL_RUN_ASYNC_STR = os.getenv("DEEPEVAL_RUN_ASYNC", "true").lower()
-DEEPEVAL_RUN_ASYNC = DEEPEVAL_RUN_ASYNC_STR in ['true', '1', 't', 'y', 'yes']
+DEEPEVAL_EVALUATION_MODEL = CFG.deepeval_evaluation_model
+# Optional: Configure async mode via env var
+DEEPEVAL_RUN_ASYNC = CFG.run_async
+# Number of test cases evaluated concurrently up front; 1 (the default) evaluates each case inside its own test
+EVAL_CONCURRENCY = CFG.eval_concurrency
+# Submit test cases sharing a metric configuration to DeepEval in one evaluate() call
+EVAL_BATCH = CFG.eval_batch
 
 
 # --- Test Setup ---
 
-# Load test cases once for the entire test session
-logger.info(f"Pytest: Loading test cases from directory: {TEST_DATA_DIR}")
-if not os.path.isdir(TEST_DATA_DIR):
-     logger.warning(f"Test data directory '{TEST_DATA_DIR}' not found. Skipping tests.")
-     ALL_TEST_CASES = []
-     TEST_CASE_IDS = []
-else:
-    ALL_TEST_CASES = load_test_cases_from_directory(TEST_DATA_DIR)
-    logger.info(f"Pytest: Found {len(ALL_TEST_CASES)} test cases.")
-    # Create IDs for pytest parametrization
-    TEST_CASE_IDS = [
-        f"{os.path.basename(tc.get('_file_path', 'unknown'))}[{tc.get('id', 'no_id')}]"
-        for tc in ALL_TEST_CASES
-    ]
+def load_test_cases() -> List[Dict[str, Any]]:
+    """Loads every test case in TEST_DATA_DIR (through the shared pickle cache)."""
+    logger.info(f"Pytest: Loading test cases from directory: {TEST_DATA_DIR}")
+    test_cases = load_test_cases_cached(TEST_DATA_DIR, TEST_CASE_CACHE_DIR)
+    logger.info(f"Pytest: Found {len(test_cases)} test cases.")
+    return test_cases
+
+@lru_cache(maxsize=1)
+def load_suite() -> List[TestCaseRef]:
+    """
+    Returns a TestCaseRef per test case, loaded once per session on first use.
+
+    Only the refs are kept: pytest holds every parametrization value for the
+    whole session, so the (possibly large) test case dicts are loaded again
+    when their test runs instead. Returns an empty list if TEST_DATA_DIR
+    doesn't exist or can't be accessed, so collection doesn't crash.
+    """
+    try:
+        is_dir = stat.S_ISDIR(os.stat(TEST_DATA_DIR).st_mode)
+    except OSError: # Missing, or a parent directory isn't accessible (PermissionError)
+        is_dir = False
+    if not is_dir:
+        logger.warning(f"Test data directory '{TEST_DATA_DIR}' not found. Skipping tests.")
+        return []
+    return [TestCaseRef.from_test_case(tc) for tc in load_test_cases()]
+
+def pytest_generate_tests(metafunc: pytest.Metafunc):
+    """Parametrizes tests that take test_case_ref with the TestCaseRefs of the suite."""
+    if "test_case_ref" not in metafunc.fixturenames:
+        return
+    refs = load_suite()
+    if not refs:
+        # Skip (rather than silently collect nothing) if no test cases were loaded
+        skip = pytest.mark.skip(reason=f"No test cases found in {TEST_DATA_DIR}")
+        metafunc.parametrize("test_case_ref", [pytest.param(None, marks=skip)], ids=["no_test_cases"])
+        return
+    metafunc.parametrize("test_case_ref", refs, ids=[ref.pytest_id for ref in refs])
 
 # Fixture to provide a ChatbotClient instance
 @pytest.fixture(scope="session")
@@ -52,60 +85,117 @@ def chatbot_client_session() -> BaseChatbotClient:
     if not CHATBOT_API_ENDPOINT:
         pytest.skip("CHATBOT_API_ENDPOINT environment variable not set. Skipping tests that require client.")
 
-    # Use the factory function with config from environment variables
+    # Use the factory function with config from environment variables.
+    # The session-scoped client keeps its connections alive across all tests.
     client_config = {
         "type": "http", # Assuming HTTP client for now
         "api_endpoint": CHATBOT_API_ENDPOINT,
-        "api_key": CHATBOT_API_KEY
+        "api_key": CHATBOT_API_KEY,
+        "payload_schema": CFG.chatbot_payload_schema or DEFAULT_PAYLOAD_SCHEMA,
+        "model_name": CFG.chatbot_model_name,
+        "pool_maxsize": EVAL_CONCURRENCY, # One pooled connection per in-flight test case
+        "cache": CFG.use_cache,
+        "cache_dir": CFG.cache_dir,
+        "semantic_cache": CFG.use_semantic_cache,
+        "semantic_cache_threshold": CFG.semantic_threshold
     }
     client = get_chatbot_client(client_config)
     yield client # Provide the client to the tests
     logger.info("Pytest: Tearing down ChatbotClient session...")
     client.close_session()
 
+def selected_refs(session: pytest.Session) -> List[TestCaseRef]:
+    """Returns the TestCaseRefs of the collected (not deselected) test items."""
+    refs = []
+    for item in session.items:
+        callspec = getattr(item, "callspec", None)
+        ref = callspec.params.get("test_case_ref") if callspec is not None else None
+        if ref is not None:
+            refs.append(ref)
+    return refs
+
+@pytest.fixture(scope="session")
+def batched_results(request: pytest.FixtureRequest, chatbot_client_session: BaseChatbotClient) -> Optional[Dict[str, EvaluationResult]]:
+    """
+    Evaluates the selected test cases concurrently once and returns the results by file path.
+
+    Opt-in: chatbot calls are network bound, so overlapping up to
+    EVAL_CONCURRENCY of them makes the run take roughly as long as the slowest
+    cases instead of the sum of all (evaluate() calls still run one at a time).
+    With EVAL_BATCH, all responses are fetched first and DeepEval runs once per
+    metric configuration (see aevaluate_test_cases). Only the cases of the
+    tests pytest is running are evaluated, so -k, node IDs and --lf don't pay
+    for the whole suite. Returns None (each test then evaluates its own case)
+    unless EVAL_CONCURRENCY is above 1 or EVAL_BATCH is set, and always under
+    pytest-xdist, whose workers each run only a share of the cases.
+    """
+    if (EVAL_CONCURRENCY <= 1 and not EVAL_BATCH) or os.getenv("PYTEST_XDIST_WORKER"):
+        return None
+    selected = {ref.file_path for ref in selected_refs(request.session)}
+    test_cases = [tc for tc in load_test_cases() if tc["_file_path"] in selected]
+    logger.info(f"Pytest: Evaluating {len(test_cases)} test cases (max concurrency: {EVAL_CONCURRENCY}, batched: {EVAL_BATCH})...")
+
+    async def run() -> List[EvaluationResult]:
+        try:
+            if EVAL_BATCH:
+                return await aevaluate_test_cases(
+                    test_cases_data=test_cases,
+                    chatbot_client=chatbot_client_session,
+                    global_model_config=DEEPEVAL_EVALUATION_MODEL,
+                    run_async=DEEPEVAL_RUN_ASYNC,
+                    max_concurrent=EVAL_CONCURRENCY
+                )
+            return await aevaluate_all(
+                test_cases_data=test_cases,
+                chatbot_client=chatbot_client_session,
+                global_model_config=DEEPEVAL_EVALUATION_MODEL,
+                run_async=DEEPEVAL_RUN_ASYNC,
+                max_concurrency=EVAL_CONCURRENCY
+            )
+        finally:
+            await chatbot_client_session.aclose_session() # Release resources bound to this loop
+
+    results = asyncio.run(run())
+    return {tc["_file_path"]: result for tc, result in zip(test_cases, results)}
 
-# --- Test Function ---
 
-# Skip all tests in this file if no test cases were loaded
-pytestmark = pytest.mark.skipif(not ALL_TEST_CASES, reason=f"No test cases found in {TEST_DATA_DIR}")
+# --- Test Function ---
 
-@pytest.mark.parametrize("test_case_data", ALL_TEST_CASES, ids=TEST_CASE_IDS)
-def test_chatbot_evaluation(test_case_data: dict, chatbot_client_session: BaseChatbotClient):
+# Parametrized with the suite's TestCaseRefs by pytest_generate_tests
+def test_chatbot_evaluation(
+    test_case_ref: TestCaseRef,
+    chatbot_client_session: BaseChatbotClient,
+    batched_results: Optional[Dict[str, EvaluationResult]],
+    record_eval_result
+):
     """
-    Runs a single chatbot evaluation test case using pytest.
+    Checks the evaluation result of a single chatbot test case using pytest.
     """
-    test_id = test_case_data.get("id", "unknown_id")
-    file_path = test_case_data.get("_file_path", "unknown_file")
-    logger.info(f"Pytest: Running evaluation for test case ID: {test_id} from file: {os.path.basename(file_path)}")
-
-    # Perform the evaluation using the refactored evaluator function
-    # Pass evaluation model config and async setting
-    result: EvaluationResult = evaluate_test_case(
-        test_case_data=test_case_data,
-        chatbot_client=chatbot_client_session,
-        global_model_config=DEEPEVAL_EVALUATION_MODEL, # Can be None
-        run_async=DEEPEVAL_RUN_ASYNC
-    )
-
-    # --- Assertion for Pytest Pass/Fail ---
-    # Assert that the evaluation was successful using the EvaluationResult dataclass.
-    error_msg = result.error or "No error message provided."
-    metrics_summary = "\nMetrics Results:\n"
-    for mr in result.metrics_results:
-        score_str = f"{mr.score:.4f}" if mr.score is not None else "N/A"
-        metrics_summary += (
-            f"  - Metric: {mr.metric}, "
-            f"Score: {score_str}, "
-            f"Threshold: {mr.threshold}, "
-            f"Success: {mr.success}, "
-            f"Reason: {mr.reason}\n"
+    test_id = test_case_ref.id
+    file_name = test_case_ref.file_name
+    # Evaluated up front unless batched_results is disabled (None) or lacks this case
+    result: Optional[EvaluationResult] = batched_results.get(test_case_ref.file_path) if batched_results is not None else None
+    if result is None:
+        logger.info(f"Pytest: Running evaluation for test case ID: {test_id} from file: {file_name}")
+        # Loaded only now (and not cached) so it is released after the test
+        test_case_data = load_test_case_from_file(test_case_ref.file_path, cache=False)
+        assert test_case_data is not None, f"Test case file '{test_case_ref.file_path}' could not be loaded"
+
+        # Perform the evaluation using the refactored evaluator function
+        # Pass evaluation model config and async setting
+        result = evaluate_test_case(
+            test_case_data=test_case_data,
+            chatbot_client=chatbot_client_session,
+            global_model_config=DEEPEVAL_EVALUATION_MODEL, # Can be None
+            run_async=DEEPEVAL_RUN_ASYNC
         )
 
-    assert result.success, \
-        f"Test Case Failed: ID='{result.id}', File='{os.path.basename(result.file_path or 'N/A')}'\n" \
-        f"Chatbot Response: {result.chatbot_response}\n" \
-        f"Failure Reason: {error_msg}\n" \
-        f"{metrics_summary}"
+    # --- Assertion for Pytest Pass/Fail ---
+    # Fail unless the evaluation was successful. Per-metric details are logged by
+    # the evaluator and written out by conftest.py with --output-jsonl.
+    record_eval_result(result)
+    if not result.success:
+        pytest.fail(f"{test_id}: {result.error or 'metrics failed'}")
 
     logger.info(f"Pytest: Finished evaluation for test case ID: {result.id}. Success: {result.success}")
 
@@ -117,3 +207,7 @@ def test_chatbot_evaluation(test_case_data: dict, chatbot_client_session: BaseCh
 # 3. Navigate to the project root directory.
 # 4. Run pytest: pytest tests/
 # 5. For HTML report: pytest tests/ --html=report.html --self-contained-html
+# 6. In parallel (pytest-xdist): pytest tests/ -n auto --dist=load
+# 7. Set EVAL_CONCURRENCY (e.g. 16) to evaluate test cases concurrently up front (default 1: each case in its own test)
+# 8. Set EVAL_BATCH=true to submit test cases to DeepEval in batches (like run_eval.py --batch)
+# 9. Write structured results: pytest tests/ --output-jsonl=results.jsonl
@@ -0,0 +1,55 @@
+# tests/test_evaluator.py
+import pytest
+from types import SimpleNamespace
+
+from chatbot_eval_pkg.types import EvaluationResult
+
+evaluator = pytest.importorskip("chatbot_eval_pkg.evaluator", exc_type=ImportError)
+
+
+def _deepeval_result(name, index=None):
+    """A stand-in for one of deepeval.evaluate()'s results, passing unless name is 'case1'."""
+    success = name != "case1"
+    metric = SimpleNamespace(metric="Stub", score=1.0 if success else 0.0, threshold=0.5, success=success, reason=name, error=None)
+    return SimpleNamespace(name=name, index=index, success=success, metrics_results=[metric])
+
+def _entries(*names):
+    return [(EvaluationResult(id=name, success=False, duration=0.0), SimpleNamespace(name=name)) for name in names]
+
+def _run_batch(monkeypatch, entries, results_for, run_async=True):
+    calls = []
+    def fake_evaluate(test_cases, metrics, print_results, run_async):
+        calls.append(run_async)
+        return results_for(test_cases)
+    monkeypatch.setattr(evaluator, "evaluate", fake_evaluate)
+    evaluator._evaluate_batch(entries, metrics=[], run_async=run_async)
+    return calls
+
+def test_evaluate_batch_matches_results_finished_out_of_order(monkeypatch):
+    entries = _entries("case0", "case1", "case2")
+    # Finish order, as returned by DeepEval with run_async
+    _run_batch(monkeypatch, entries, lambda test_cases: [_deepeval_result(tc.name) for tc in reversed(test_cases)])
+
+    assert [result.metrics_results[0].reason for result, _ in entries] == ["case0", "case1", "case2"]
+    assert [result.success for result, _ in entries] == [True, False, True]
+
+def test_evaluate_batch_prefers_result_index(monkeypatch):
+    entries = _entries("case0", "case1", "case2")
+    _run_batch(monkeypatch, entries, lambda test_cases: [
+        _deepeval_result(tc.name, index=i) for i, tc in reversed(list(enumerate(test_cases)))
+    ])
+
+    assert [result.metrics_results[0].reason for result, _ in entries] == ["case0", "case1", "case2"]
+
+def test_evaluate_batch_runs_synchronously_with_duplicate_ids(monkeypatch):
+    entries = _entries("case0", "case0", "case1")
+    calls = _run_batch(monkeypatch, entries, lambda test_cases: [_deepeval_result(tc.name) for tc in test_cases])
+
+    assert calls == [False]
+    assert [result.success for result, _ in entries] == [True, True, False]
+
+def test_evaluate_batch_reports_unmatched_results(monkeypatch):
+    entries = _entries("case0", "case2")
+    _run_batch(monkeypatch, entries, lambda test_cases: [_deepeval_result("other0"), _deepeval_result("other2")])
+
+    assert all(not result.success and result.error for result, _ in entries)